@@ -1,8 +1,15 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+import cube
+import dataset
+import drilldown
+import growth
+import profiler
+import startup
+import tables
+import views
 
 
 # --- Streamlit UI ---
@@ -84,66 +91,356 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Data Loading ---
-@st.cache_data
+@st.cache_resource
 def load_main_csv():
-    import os
-    # Try manufacturer file first
-    manu_path = "../VAHAN_Vehicle_Registrations_with_Manufacturer.csv"
-    manu_alt = "data/VAHAN_Vehicle_Registrations_with_Manufacturer.csv"
-    manu_local = "VAHAN_Vehicle_Registrations_with_Manufacturer.csv"
-    if os.path.exists(manu_path):
-        return pd.read_csv(manu_path)
-    elif os.path.exists(manu_alt):
-        return pd.read_csv(manu_alt)
-    elif os.path.exists(manu_local):
-        return pd.read_csv(manu_local)
-    # Fallback to old sample file
-    file_path = "../VAHAN Vehicle Registrations by Vehicle Category_Sample_Data.csv"
-    alt_path = "data/VAHAN Vehicle Registrations by Vehicle Category_Sample_Data.csv"
-    local_path = "VAHAN Vehicle Registrations by Vehicle Category_Sample_Data.csv"
-    if os.path.exists(file_path):
-        return pd.read_csv(file_path)
-    elif os.path.exists(alt_path):
-        return pd.read_csv(alt_path)
-    elif os.path.exists(local_path):
-        return pd.read_csv(local_path)
+    # One read-only dataset per process, shared by every session. Derived
+    # columns and the rollup cube are built here and never mutated per rerun.
+    # When started through startup.py this was already done before boot.
+    return startup.take('shared', dataset.load_shared)
+
+@st.cache_resource
+def get_result_cache():
+    # Shared by all sessions so popular selections are computed once.
+    # Seeded with the views precompute.py saved for this dataset version,
+    # plus the default page when startup.py warmed it.
+    return startup.take('results', lambda: startup.seeded_cache(load_main_csv()))
+
+@st.cache_resource
+def get_profiler():
+    # Process-wide stage histograms; see profiler.from_environment for export.
+    return profiler.from_environment()
+
+@st.cache_resource
+def get_exporter():
+    # Background export workers and their files, shared by all sessions.
+    # Imported here so pyarrow only loads once someone exports.
+    import export
+    return export.Exporter()
+
+def section_views(shared, selection, section, run):
+    # Views of one dashboard section (views.SECTIONS) for the sidebar
+    # selection, from the shared result cache. Sections are cached apart,
+    # so only the ones on screen are ever computed.
+    def compute():
+        chosen = run.call('filter', lambda: shared.select(**selection), shared.records)
+        return views.compute_section(chosen, bool(shared.manufacturers), section, run)
+
+    return run.call('views_' + section, lambda: get_result_cache().get_or_compute(
+        views.cache_key(shared, selection, section), compute,
+    ))
+
+def rto_views(shared, selection, state_code, run):
+    # RTO level of one expanded state, cached like a section.
+    def compute():
+        chosen = run.call('filter', lambda: shared.select(**selection), shared.records)
+        return views.rto_level(chosen, state_code, run)
+
+    return run.call('views_rtos', lambda: get_result_cache().get_or_compute(
+        views.cache_key(shared, selection, views.rto_part(state_code)), compute,
+    ))
+
+# Each fragment reruns on its own when a widget inside it changes, e.g.
+# paging a table. Its inputs are passed explicitly: the shared dataset and
+# the sidebar selection, which only change on a full rerun.
+@st.fragment
+def summary_table(shared, selection, run):
+    agg = section_views(shared, selection, 'overview', run)['agg']
+
+    st.markdown("### 📋 Registration Summary Table")
+    st.markdown('<div class="data-table">', unsafe_allow_html=True)
+    with run.stage('table_summary', len(agg)) as stage:
+        shown = tables.show(agg, 'summary', {'Registrations': '{:,.0f}'}, height=400,
+                            version=views.cache_key(shared, selection, 'overview'))
+        stage.rows_out = len(shown)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def trend_charts(shared, selection, run):
+    # Plotly is imported by the sections that draw charts, not at startup.
+    import plotly.express as px
+
+    import charts
+
+    computed = section_views(shared, selection, 'overview', run)
+    agg = computed['agg']
+
+    # Enhanced Trend Graphs
+    st.markdown("### 📊 Registration Trends Analysis")
+    
+    # Vehicle Category Trends
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.markdown("#### 🚙 Registrations by Vehicle Category")
+    
+    with run.stage('chart_category', len(agg)) as stage:
+        fig = charts.bars(
+            agg,
+            x='Year',
+            y='Registrations',
+            color='Vehicle Category',
+            title="Vehicle Registration Trends by Category",
+            palette=px.colors.qualitative.Set3
+        )
+        stage.payload_bytes = charts.payload_bytes(fig)
+        st.plotly_chart(fig, width="stretch")
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Manufacturer Trends
+    if shared.manufacturers:
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.markdown("#### 🏭 Registrations by Manufacturer")
+        
+        # Top manufacturers only for better visualization
+        agg_top = computed['agg_top']
+        
+        with run.stage('chart_manufacturer', len(agg_top)) as stage:
+            figm = charts.bars(
+                agg_top,
+                x='Year',
+                y='Registrations',
+                color='Manufacturer',
+                title="Top 10 Manufacturers - Registration Trends",
+                palette=px.colors.qualitative.Pastel
+            )
+            stage.payload_bytes = charts.payload_bytes(figm)
+            st.plotly_chart(figm, width="stretch")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment
+def growth_section(shared, selection, run, section, heading, cmap, side_by_side=False):
+    import charts
+
+    period = {'yoy': 'year', 'qoq': 'quarter', 'mom': 'month'}[section]
+    label = growth.PERIOD_COLUMNS[period]
+    change = growth.growth_column(period)
+    prefix = growth.GROWTH_PREFIXES[period]
+    table = section_views(shared, selection, section, run)[section]
+
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.markdown(f"#### 📊 {heading} Growth")
+
+    # MoM is always by vehicle category; YoY and QoQ show top performers
+    # per manufacturer when the data has them.
+    if 'Manufacturer' in table.columns:
+        columns = [label, 'Vehicle Category', 'Manufacturer', 'Registrations', change]
+        lines = dict(color='Manufacturer', dash='Vehicle Category',
+                     title=f"{prefix} Growth Trends by Manufacturer")
     else:
-        st.error("Sample data CSV not found. Please place it in the project root or data folder.")
-        return pd.DataFrame()
-
-df = load_main_csv()
-
-if not df.empty:
-    # Preprocess
-    df['Date'] = pd.to_datetime(df['Date (date)'])
-    df['Year'] = df['Date'].dt.year
-    df['Quarter'] = df['Date'].dt.to_period('Q').astype(str)
-    df['Vehicle Category'] = df['Vehicle Category (vehicle_type)']
-    df['Registrations'] = pd.to_numeric(df['Registrations (registrations)'], errors='coerce')
-    if 'Manufacturer' in df.columns:
-        df['Manufacturer'] = df['Manufacturer'].astype(str)
-        manufacturers = sorted(df['Manufacturer'].unique())
+        columns = [label, 'Vehicle Category', 'Registrations', change]
+        lines = dict(color='Vehicle Category', title=f"{prefix} Growth Trends by Vehicle Category")
+
+    if side_by_side:
+        table_box, chart_box = st.columns(2)
     else:
-        manufacturers = []
+        table_box, chart_box = st.container(), st.container()
+
+    display = table[columns].dropna()
+    with table_box, run.stage(f'table_{section}', len(display)) as stage:
+        shown = tables.show(
+            display, section,
+            {'Registrations': '{:,.0f}', change: '{:.1f}%'},
+            gradient=change, cmap=cmap, height=300,
+            version=views.cache_key(shared, selection, section)
+        )
+        stage.rows_out = len(shown)
+
+    # Growth trend chart
+    with chart_box, run.stage(f'chart_{section}', len(display)) as stage:
+        fig, note = charts.growth_lines(table, period, **lines)
+        if period != 'year':
+            fig.update_xaxes(tickangle=45)
+        stage.payload_bytes = charts.payload_bytes(fig)
+        st.plotly_chart(fig, width="stretch")
+        if note:
+            st.caption(note)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def market_insights(shared, selection, run):
+    import plotly.express as px
+
+    import charts
+
+    computed = section_views(shared, selection, 'insights', run)
+
+    st.markdown("### 🎯 Market Insights")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.markdown("#### 🏆 Top Performing States")
+        
+        state_summary = computed['state_summary']
+        
+        with run.stage('chart_states', len(state_summary)) as stage:
+            fig_states = px.bar(
+                x=state_summary.values,
+                y=state_summary.index,
+                orientation='h',
+                title="Top 10 States by Total Registrations",
+                color=state_summary.values,
+                color_continuous_scale='viridis'
+            )
+
+            fig_states.update_layout(
+                template=charts.TEMPLATE,
+                hovermode='closest',
+                showlegend=False,
+                height=400
+            )
+            stage.payload_bytes = charts.payload_bytes(fig_states)
+
+            st.plotly_chart(fig_states, width="stretch")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.markdown("#### 📊 Vehicle Category Distribution")
+        
+        category_dist = computed['category_dist']
+        
+        with run.stage('chart_categories', len(category_dist)) as stage:
+            fig_pie = px.pie(
+                values=category_dist.values,
+                names=category_dist.index,
+                title="Market Share by Vehicle Category",
+                color_discrete_sequence=px.colors.qualitative.Set3
+            )
+
+            fig_pie.update_layout(template=charts.TEMPLATE, height=400)
+            stage.payload_bytes = charts.payload_bytes(fig_pie)
+
+            st.plotly_chart(fig_pie, width="stretch")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment
+def state_drilldown(shared, selection, run):
+    # National -> state -> RTO. Only the level on screen is computed and
+    # sent: the state table, or the RTOs of the one expanded state.
+    states = section_views(shared, selection, 'states', run)['state_level']
+
+    st.markdown("### 🗺️ State & RTO Drill-down")
+    if states.empty:
+        st.info("No registrations match the current filters.")
+        return
+
+    names = dict(zip(states[drilldown.STATE_CODE], states[cube.STATE]))
+    expanded = st.selectbox(
+        "🔎 Drill into a state",
+        [None] + list(names),
+        format_func=lambda code: "All states" if code is None else f"{names[code]} ({code})",
+        key="drill_state",
+        help="Pick a state to see its RTO offices"
+    )
+
+    formats = {'Registrations': '{:,.0f}', drilldown.SHARE: '{:.1f}%'}
+    st.markdown('<div class="data-table">', unsafe_allow_html=True)
+    if expanded is None:
+        st.caption(f"India › {len(states):,} states · {states['Registrations'].sum():,.0f} registrations")
+        with run.stage('table_states', len(states)) as stage:
+            shown = tables.show(states, 'states', formats, gradient=drilldown.SHARE, cmap='Blues', height=400,
+                                version=views.cache_key(shared, selection, 'states'))
+            stage.rows_out = len(shown)
+    else:
+        rtos = rto_views(shared, selection, expanded, run)
+        st.caption(f"India › {names[expanded]} · {len(rtos):,} RTO offices · "
+                   f"{rtos['Registrations'].sum():,.0f} registrations")
+        with run.stage('table_rtos', len(rtos)) as stage:
+            shown = tables.show(rtos, 'rtos', formats, gradient=drilldown.SHARE, cmap='Blues', height=400,
+                                version=views.cache_key(shared, selection, views.rto_part(expanded)))
+            stage.rows_out = len(shown)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+FILTERED_ROWS = "Filtered rows"
+# Exportable views: label -> (views.SECTIONS section, view name).
+EXPORT_VIEWS = {
+    "Summary table": ('overview', 'agg'),
+    "YoY growth": ('yoy', 'yoy'),
+    "QoQ growth": ('qoq', 'qoq'),
+    "MoM growth": ('mom', 'mom'),
+    "Top states": ('insights', 'state_summary'),
+    "Category distribution": ('insights', 'category_dist'),
+    "State drill-down": ('states', 'state_level'),
+}
+
+@st.fragment
+def export_panel(shared, selection, run):
+    # Starts exports on the shared background workers and shows their
+    # progress; the rows are streamed to a file, never built up here.
+    import export
+
+    st.markdown("### 📥 Export")
+    what = st.selectbox("Data", [FILTERED_ROWS] + list(EXPORT_VIEWS), key="export_what")
+    fmt = st.selectbox("Format", export.FORMATS, format_func=str.upper, key="export_format")
+    if st.button("Start export", key="export_start", width="stretch"):
+        if what == FILTERED_ROWS:
+            total, chunks = shared.rows(**selection)
+        else:
+            section, view = EXPORT_VIEWS[what]
+            frame = section_views(shared, selection, section, run)[view]
+            total, chunks = len(frame), export.frame_chunks(frame)
+        name = "vahan_" + what.lower().replace(' ', '_').replace('-', '_')
+        st.session_state['export_job'] = get_exporter().submit(name, fmt, chunks, total).id
+
+    job = get_exporter().job(st.session_state.get('export_job'))
+    if job is None:
+        return
+    if not job.finished:
+        export_progress(job.id)
+    elif job.status == 'failed':
+        st.error(f"Export of {job.file_name} failed: {job.error}")
+    else:
+        st.download_button(
+            f"⬇️ Download {job.file_name}",
+            data=job.read,
+            file_name=job.file_name,
+            mime=job.mime,
+            key=f"download_{job.id}",
+            on_click="ignore",
+            width="stretch"
+        )
+        st.caption(f"{job.total:,} rows · {os.path.getsize(job.path) / 2**20:,.1f} MB · {job.seconds:.1f} s")
+
+@st.fragment(run_every=1)
+def export_progress(job_id):
+    job = get_exporter().job(job_id)
+    if job is None or job.finished:
+        # Redraws the panel with the download button.
+        st.rerun()
+    st.progress(job.progress, text=f"Exporting {job.file_name}: {job.written:,} of {job.total:,} rows")
+
+run = get_profiler().run()
+
+with run.stage('load_main_csv') as stage:
+    shared = load_main_csv()
+    stage.rows_out = None if shared is None else shared.records
+if shared is None:
+    st.error("Sample data CSV not found. Please place it in the project root or data folder.")
+else:
+    # Picks up new or changed month partitions without a full reload.
+    run.call('refresh', lambda: shared.refresh(max_age=30))
+
+if shared is not None and not shared.empty:
+    manufacturers = shared.manufacturers
 
     # Enhanced Sidebar filters
     st.sidebar.markdown("### 🎛️ Filter Controls")
     st.sidebar.markdown("---")
     
-    years = sorted(df['Year'].unique())
-    categories = sorted(df['Vehicle Category'].unique())
+    years = shared.years
+    categories = shared.categories
+    # The same defaults precompute.py warms the result cache with.
+    defaults = views.default_selection(shared)
     
     selected_years = st.sidebar.multiselect(
         "📅 Select Years", 
         years, 
-        default=years,
+        default=defaults['years'],
         help="Choose the years you want to analyze"
     )
     
     selected_categories = st.sidebar.multiselect(
         "🚙 Select Vehicle Categories", 
         categories, 
-        default=categories,
+        default=defaults['categories'],
         help="Filter by vehicle types"
     )
     
@@ -151,37 +448,58 @@ if not df.empty:
         selected_manufacturers = st.sidebar.multiselect(
             "🏭 Select Manufacturers", 
             manufacturers, 
-            default=manufacturers[:10] if len(manufacturers) > 10 else manufacturers,
+            default=defaults['manufacturers'],
             help="Choose manufacturers to compare"
         )
     else:
         selected_manufacturers = []
 
+    selected_states = st.sidebar.multiselect(
+        "🗺️ Select States",
+        shared.states,
+        help="Leave empty to include all states"
+    )
+
+    selected_rtos = st.sidebar.multiselect(
+        "🏢 Select RTO Offices",
+        shared.rtos_in(selected_states or None),
+        help="Leave empty to include all RTOs in the selected states"
+    )
+
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 📊 Dashboard Info")
     st.sidebar.info(f"""
     **Data Overview:**
-    - Total Records: {len(df):,}
-    - Date Range: {df['Date'].min().strftime('%Y-%m-%d')} to {df['Date'].max().strftime('%Y-%m-%d')}
-    - States Covered: {df['State Name (state_name)'].nunique()}
+    - Total Records: {shared.records:,}
+    - Date Range: {shared.date_min.strftime('%Y-%m-%d')} to {shared.date_max.strftime('%Y-%m-%d')}
+    - States Covered: {shared.state_count}
     - Vehicle Categories: {len(categories)}
+    - In-memory Size: {shared.memory_bytes / 2**20:,.2f} MB ({shared.backend} backend)
     """)
 
-    filtered = df[
-        df['Year'].isin(selected_years)
-        & df['Vehicle Category'].isin(selected_categories)
-        & (df['Manufacturer'].isin(selected_manufacturers) if manufacturers else True)
-    ]
+    selection = {
+        'years': selected_years,
+        'categories': selected_categories,
+        'manufacturers': selected_manufacturers if manufacturers else None,
+        'states': selected_states or None,
+        'rtos': selected_rtos or None,
+    }
+    show_performance = st.sidebar.checkbox(
+        "⏱️ Show performance panel",
+        help="Times every stage of this rerun: load, filter, each view, table and chart. "
+             "Paging a table reruns only its section and does not update the panel."
+    )
 
     # Key Metrics Section
     st.markdown("### 📈 Key Performance Indicators")
     
     col1, col2, col3, col4 = st.columns(4)
     
-    total_registrations = filtered['Registrations'].sum()
-    avg_registrations = filtered['Registrations'].mean()
-    unique_states = filtered['State Name (state_name)'].nunique()
-    unique_rtos = filtered['RTO Name (office_name)'].nunique()
+    kpis = section_views(shared, selection, 'overview', run)['kpis']
+    total_registrations = kpis['total']
+    avg_registrations = kpis['average']
+    unique_states = kpis['states']
+    unique_rtos = kpis['rtos']
     
     with col1:
         st.metric(
@@ -213,288 +531,64 @@ if not df.empty:
 
     st.markdown("---")
 
-    # Data Table Section
-    if manufacturers:
-        agg = filtered.groupby(['Year', 'Vehicle Category', 'Manufacturer'], as_index=False)['Registrations'].sum()
-    else:
-        agg = filtered.groupby(['Year', 'Vehicle Category'], as_index=False)['Registrations'].sum()
-    
-    st.markdown("### 📋 Registration Summary Table")
-    st.markdown('<div class="data-table">', unsafe_allow_html=True)
-    st.dataframe(
-        agg.style.format({'Registrations': '{:,.0f}'}),
-        use_container_width=True,
-        height=400
+    # Only the open tab runs; the others compute nothing until selected.
+    summary_tab, growth_tab, insights_tab, drilldown_tab = st.tabs(
+        ["📋 Summary & Trends", "📈 Growth Analysis", "🎯 Market Insights", "🗺️ State & RTO Drill-down"],
+        key="section",
+        on_change="rerun"
     )
-    st.markdown('</div>', unsafe_allow_html=True)
 
-    # Enhanced Trend Graphs
-    st.markdown("### 📊 Registration Trends Analysis")
-    
-    # Vehicle Category Trends
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    st.markdown("#### 🚙 Registrations by Vehicle Category")
-    
-    fig = px.bar(
-        agg, 
-        x='Year', 
-        y='Registrations', 
-        color='Vehicle Category',
-        barmode='group',
-        title="Vehicle Registration Trends by Category",
-        color_discrete_sequence=px.colors.qualitative.Set3,
-        hover_data={'Registrations': ':,.0f'}
-    )
-    
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Arial, sans-serif", size=12),
-        title_font_size=16,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        hovermode='x unified'
+    if summary_tab.open:
+        with summary_tab:
+            summary_table(shared, selection, run)
+            trend_charts(shared, selection, run)
+
+    if growth_tab.open:
+        with growth_tab:
+            col1, col2 = st.columns(2)
+            with col1:
+                growth_section(shared, selection, run, 'yoy', "Year-over-Year (YoY)", 'RdYlGn')
+            with col2:
+                growth_section(shared, selection, run, 'qoq', "Quarter-over-Quarter (QoQ)", 'RdYlBu')
+            growth_section(shared, selection, run, 'mom', "Month-over-Month (MoM)", 'RdYlGn', side_by_side=True)
+
+    if insights_tab.open:
+        with insights_tab:
+            market_insights(shared, selection, run)
+
+    if drilldown_tab.open:
+        with drilldown_tab:
+            state_drilldown(shared, selection, run)
+
+    with st.sidebar:
+        st.markdown("---")
+        export_panel(shared, selection, run)
+
+    cache_stats = get_result_cache().stats()
+    st.sidebar.caption(
+        f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+        f"{cache_stats['evictions']} evictions ({cache_stats['bytes'] / 2**20:,.1f} MB)"
     )
-    
-    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-    
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Manufacturer Trends
-    if manufacturers:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown("#### 🏭 Registrations by Manufacturer")
-        
-        # Top manufacturers only for better visualization
-        top_manufacturers = agg.groupby('Manufacturer')['Registrations'].sum().nlargest(10).index
-        agg_top = agg[agg['Manufacturer'].isin(top_manufacturers)]
-        
-        figm = px.bar(
-            agg_top, 
-            x='Year', 
-            y='Registrations', 
-            color='Manufacturer',
-            barmode='group',
-            title="Top 10 Manufacturers - Registration Trends",
-            color_discrete_sequence=px.colors.qualitative.Pastel,
-            hover_data={'Registrations': ':,.0f'}
-        )
-        
-        figm.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            title_font_size=16,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            hovermode='x unified'
-        )
-        
-        figm.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-        figm.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-        
-        st.plotly_chart(figm, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
 
-    # Enhanced YoY Growth Calculation
-    st.markdown("### 📈 Growth Analysis")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown("#### 📊 Year-over-Year (YoY) Growth")
-        
-        if manufacturers:
-            agg = agg.sort_values(['Manufacturer', 'Vehicle Category', 'Year'])
-            agg['Prev_Registrations'] = agg.groupby(['Manufacturer', 'Vehicle Category'])['Registrations'].shift(1)
-            agg['YoY_Growth_%'] = ((agg['Registrations'] - agg['Prev_Registrations']) / agg['Prev_Registrations'] * 100).round(2)
-            
-            # Show top performers
-            yoy_display = agg[['Year', 'Vehicle Category', 'Manufacturer', 'Registrations', 'YoY_Growth_%']].dropna()
-            st.dataframe(
-                yoy_display.style.format({
-                    'Registrations': '{:,.0f}',
-                    'YoY_Growth_%': '{:.1f}%'
-                }).background_gradient(subset=['YoY_Growth_%'], cmap='RdYlGn'),
-                use_container_width=True,
-                height=300
-            )
-            
-            # Growth trend chart
-            fig2 = px.line(
-                agg.dropna(), 
-                x='Year', 
-                y='YoY_Growth_%', 
-                color='Manufacturer', 
-                line_dash='Vehicle Category',
-                markers=True,
-                title="YoY Growth Trends by Manufacturer",
-                hover_data={'YoY_Growth_%': ':.1f%'}
-            )
-        else:
-            agg = agg.sort_values(['Vehicle Category', 'Year'])
-            agg['Prev_Registrations'] = agg.groupby('Vehicle Category')['Registrations'].shift(1)
-            agg['YoY_Growth_%'] = ((agg['Registrations'] - agg['Prev_Registrations']) / agg['Prev_Registrations'] * 100).round(2)
-            
-            yoy_display = agg[['Year', 'Vehicle Category', 'Registrations', 'YoY_Growth_%']].dropna()
-            st.dataframe(
-                yoy_display.style.format({
-                    'Registrations': '{:,.0f}',
-                    'YoY_Growth_%': '{:.1f}%'
-                }).background_gradient(subset=['YoY_Growth_%'], cmap='RdYlGn'),
-                use_container_width=True,
-                height=300
-            )
-            
-            fig2 = px.line(
-                agg.dropna(), 
-                x='Year', 
-                y='YoY_Growth_%', 
-                color='Vehicle Category',
-                markers=True,
-                title="YoY Growth Trends by Vehicle Category",
-                hover_data={'YoY_Growth_%': ':.1f%'}
-            )
-        
-        fig2.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            title_font_size=14,
-            hovermode='x unified'
-        )
-        fig2.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-        fig2.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-        
-        st.plotly_chart(fig2, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown("#### 📊 Quarter-over-Quarter (QoQ) Growth")
-        
-        if manufacturers:
-            agg_q = filtered.groupby(['Quarter', 'Vehicle Category', 'Manufacturer'], as_index=False)['Registrations'].sum()
-            agg_q = agg_q.sort_values(['Manufacturer', 'Vehicle Category', 'Quarter'])
-            agg_q['Prev_Registrations'] = agg_q.groupby(['Manufacturer', 'Vehicle Category'])['Registrations'].shift(1)
-            agg_q['QoQ_Growth_%'] = ((agg_q['Registrations'] - agg_q['Prev_Registrations']) / agg_q['Prev_Registrations'] * 100).round(2)
-            
-            qoq_display = agg_q[['Quarter', 'Vehicle Category', 'Manufacturer', 'Registrations', 'QoQ_Growth_%']].dropna()
-            st.dataframe(
-                qoq_display.style.format({
-                    'Registrations': '{:,.0f}',
-                    'QoQ_Growth_%': '{:.1f}%'
-                }).background_gradient(subset=['QoQ_Growth_%'], cmap='RdYlBu'),
-                use_container_width=True,
-                height=300
-            )
-            
-            fig3 = px.line(
-                agg_q.dropna(), 
-                x='Quarter', 
-                y='QoQ_Growth_%', 
-                color='Manufacturer', 
-                line_dash='Vehicle Category',
-                markers=True,
-                title="QoQ Growth Trends by Manufacturer",
-                hover_data={'QoQ_Growth_%': ':.1f%'}
-            )
-        else:
-            agg_q = filtered.groupby(['Quarter', 'Vehicle Category'], as_index=False)['Registrations'].sum()
-            agg_q = agg_q.sort_values(['Vehicle Category', 'Quarter'])
-            agg_q['Prev_Registrations'] = agg_q.groupby('Vehicle Category')['Registrations'].shift(1)
-            agg_q['QoQ_Growth_%'] = ((agg_q['Registrations'] - agg_q['Prev_Registrations']) / agg_q['Prev_Registrations'] * 100).round(2)
-            
-            qoq_display = agg_q[['Quarter', 'Vehicle Category', 'Registrations', 'QoQ_Growth_%']].dropna()
-            st.dataframe(
-                qoq_display.style.format({
-                    'Registrations': '{:,.0f}',
-                    'QoQ_Growth_%': '{:.1f}%'
-                }).background_gradient(subset=['QoQ_Growth_%'], cmap='RdYlBu'),
-                use_container_width=True,
-                height=300
-            )
-            
-            fig3 = px.line(
-                agg_q.dropna(), 
-                x='Quarter', 
-                y='QoQ_Growth_%', 
-                color='Vehicle Category',
-                markers=True,
-                title="QoQ Growth Trends by Vehicle Category",
-                hover_data={'QoQ_Growth_%': ':.1f%'}
-            )
-        
-        fig3.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            title_font_size=14,
-            hovermode='x unified'
+    if show_performance:
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("### ⏱️ Performance")
+        st.sidebar.dataframe(
+            run.table().style.format({
+                'ms': '{:,.1f}',
+                'rows_in': '{:,.0f}',
+                'rows_out': '{:,.0f}',
+                'memory_delta_mb': '{:+,.2f}',
+                'payload_kb': '{:,.1f}',
+            }, na_rep=''),
+            width="stretch",
+            hide_index=True
         )
-        fig3.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)', tickangle=45)
-        fig3.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-        
-        st.plotly_chart(fig3, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        st.sidebar.caption(f"Rerun total: {run.elapsed() * 1000:,.0f} ms")
 
-    # Additional Insights Section
-    st.markdown("---")
-    st.markdown("### 🎯 Market Insights")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown("#### 🏆 Top Performing States")
-        
-        state_summary = filtered.groupby('State Name (state_name)')['Registrations'].sum().nlargest(10)
-        
-        fig_states = px.bar(
-            x=state_summary.values,
-            y=state_summary.index,
-            orientation='h',
-            title="Top 10 States by Total Registrations",
-            color=state_summary.values,
-            color_continuous_scale='viridis'
-        )
-        
-        fig_states.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            title_font_size=14,
-            showlegend=False,
-            height=400
-        )
-        
-        st.plotly_chart(fig_states, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown("#### 📊 Vehicle Category Distribution")
-        
-        category_dist = filtered.groupby('Vehicle Category')['Registrations'].sum()
-        
-        fig_pie = px.pie(
-            values=category_dist.values,
-            names=category_dist.index,
-            title="Market Share by Vehicle Category",
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        
-        fig_pie.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif", size=12),
-            title_font_size=14,
-            height=400
-        )
-        
-        st.plotly_chart(fig_pie, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+    metrics_file = get_profiler().metrics_file
+    if metrics_file:
+        get_profiler().write(metrics_file)
 
     # Footer
     st.markdown("---")
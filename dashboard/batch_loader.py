@@ -0,0 +1,170 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import store
+
+# vehicle_data_<YEAR>_<VEHICLE_TYPE>[__<State>].csv, see DATA_COLLECTION.md.
+# Vehicle types are upper-case words joined by single underscores
+# (FOUR_WHEELER); the state, as written by scraper.fetch_all, follows a
+# double underscore so an upper-case state (UP) is not read as part of the type.
+FILE_PATTERN = re.compile(r'^vehicle_data_(\d{4})_([A-Z0-9]+(?:_[A-Z0-9]+)*)(?:__(.+))?\.csv$')
+STORE_NAME = 'vehicle_class'
+TIDY_COLUMNS = [
+    'Year', 'State Name (state_name)', 'Vehicle Category', 'Vehicle Class', 'Class Group', 'Registrations',
+]
+
+
+def discover(data_dir='data'):
+    """
+    Returns [(path, year, vehicle_type, state)] for every file in data_dir
+    that follows the naming convention, sorted by path.
+    """
+    found = []
+    for name in sorted(os.listdir(data_dir)):
+        match = FILE_PATTERN.match(name)
+        if match:
+            year, vehicle_type, state = match.groups()
+            found.append((
+                os.path.join(data_dir, name),
+                int(year),
+                vehicle_type.replace('_', ' '),
+                state.replace('_', ' ') if state else None,
+            ))
+    return found
+
+
+def parse_file(path, year, vehicle_type, state=None):
+    """
+    Parses one wide Vehicle Class x class-group file.
+    Returns (tidy, mismatches): the long-format rows and the rows whose TOTAL
+    does not equal the sum of the class-group columns.
+    """
+    wide = pd.read_csv(path, comment='#')
+    wide = wide.rename(columns={wide.columns[0]: 'Vehicle Class'})
+    groups = [c for c in wide.columns[1:] if c.upper() != 'TOTAL']
+    values = wide[groups].apply(pd.to_numeric, errors='coerce')
+
+    mismatches = pd.DataFrame(columns=['File', 'Vehicle Class', 'Sum', 'TOTAL'])
+    total_col = next((c for c in wide.columns if c.upper() == 'TOTAL'), None)
+    if total_col is not None:
+        summed = values.sum(axis=1).to_numpy()
+        reported = pd.to_numeric(wide[total_col], errors='coerce').to_numpy(dtype=float)
+        bad = ~np.isclose(summed, reported)
+        if bad.any():
+            mismatches = pd.DataFrame({
+                'File': os.path.basename(path),
+                'Vehicle Class': wide['Vehicle Class'].to_numpy()[bad],
+                'Sum': summed[bad],
+                'TOTAL': reported[bad],
+            })
+
+    tidy = pd.concat([wide[['Vehicle Class']], values], axis=1).melt(
+        id_vars='Vehicle Class', var_name='Class Group', value_name='Registrations'
+    )
+    tidy.insert(0, 'Year', year)
+    tidy.insert(1, 'State Name (state_name)', state)
+    tidy.insert(2, 'Vehicle Category', vehicle_type)
+    return tidy[TIDY_COLUMNS], mismatches
+
+
+def _parse_job(job):
+    return parse_file(*job)
+
+
+def load_all(data_dir='data', workers=None):
+    """
+    Parses every matching file in data_dir across a process pool.
+    Returns (tidy, mismatches) concatenated over all files.
+    """
+    jobs = discover(data_dir)
+    if not jobs:
+        return pd.DataFrame(columns=TIDY_COLUMNS), pd.DataFrame()
+    if workers == 1 or len(jobs) == 1:
+        results = [_parse_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_job, jobs, chunksize=max(1, len(jobs) // 64)))
+    tidy = pd.concat([r[0] for r in results], ignore_index=True)
+    found = [r[1] for r in results if len(r[1])]
+    mismatches = pd.concat(found, ignore_index=True) if found else results[0][1]
+    return compact(tidy), mismatches
+
+
+def compact(tidy):
+    """
+    Dictionary-encodes the text columns and narrows Year and Registrations,
+    like store.compact does for the main dataset.
+    """
+    tidy = tidy.copy()
+    for col in ('State Name (state_name)', 'Vehicle Category', 'Vehicle Class', 'Class Group'):
+        tidy[col] = tidy[col].astype('category')
+    tidy['Year'] = tidy['Year'].astype('int16')
+    tidy['Registrations'] = store.narrow_counts(tidy['Registrations'])
+    return tidy
+
+
+def _store_paths(data_dir):
+    folder = os.path.join(os.path.abspath(data_dir), store.CACHE_DIR_NAME, STORE_NAME)
+    return os.path.join(folder, STORE_NAME + '.arrow'), os.path.join(folder, 'manifest.json')
+
+
+def _sources(data_dir):
+    return {
+        os.path.basename(path): [os.stat(path).st_mtime_ns, os.stat(path).st_size]
+        for path, *_ in discover(data_dir)
+    }
+
+
+def build_store(data_dir='data', workers=None, force=False):
+    """
+    Loads every file into one Arrow file next to the main columnar store.
+    Skips the work when no source file was added, removed or modified.
+    Returns (arrow_path, mismatches); mismatches is None when skipped.
+    """
+    arrow_path, manifest_path = _store_paths(data_dir)
+    sources = _sources(data_dir)
+    if not force and os.path.exists(arrow_path):
+        try:
+            with open(manifest_path) as f:
+                if json.load(f).get('sources') == sources:
+                    return arrow_path, None
+        except (OSError, ValueError):
+            pass
+    tidy, mismatches = load_all(data_dir, workers)
+    os.makedirs(os.path.dirname(arrow_path), exist_ok=True)
+    store.write_arrow(arrow_path, tidy)
+    with open(manifest_path, 'w') as f:
+        json.dump({'sources': sources, 'rows': len(tidy), 'mismatches': len(mismatches)}, f)
+    return arrow_path, mismatches
+
+
+def load_store(data_dir='data', workers=None):
+    """
+    Returns the tidy vehicle class dataset, building the store if needed.
+    """
+    arrow_path, _ = build_store(data_dir, workers)
+    return store.read_partition(arrow_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Loads all vehicle_data_<YEAR>_<TYPE>.csv files in one pass.")
+    parser.add_argument('data_dir', nargs='?', default='data')
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    path, mismatches = build_store(args.data_dir, args.workers, args.force)
+    if mismatches is None:
+        print(f"{path} is up to date")
+    else:
+        print(f"Wrote {path}")
+        if len(mismatches):
+            print(f"{len(mismatches)} row(s) where TOTAL != sum of class groups:")
+            print(mismatches.to_string(index=False))
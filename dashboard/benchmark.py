@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import dataset
+import growth
+import profiler
+import store
+import synth
+import views
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_figures(computed):
+    """
+    Builds the dashboard's Plotly figures from computed views, like app.py.
+    """
+    import plotly.express as px
+
+    import charts
+
+    figures = [charts.bars(computed['agg'], 'Year', 'Registrations', 'Vehicle Category')]
+    if computed['agg_top'] is not None:
+        figures.append(charts.bars(computed['agg_top'], 'Year', 'Registrations', 'Manufacturer'))
+    for key, period in (('yoy', 'year'), ('qoq', 'quarter'), ('mom', 'month')):
+        table = computed[key]
+        dash = 'Vehicle Category' if 'Manufacturer' in table.columns else None
+        color = 'Manufacturer' if dash else 'Vehicle Category'
+        figures.append(charts.growth_lines(table, period, color, dash)[0])
+    states = computed['state_summary']
+    figures.append(px.bar(x=states.values, y=states.index, orientation='h'))
+    category_dist = computed['category_dist']
+    figures.append(px.pie(values=category_dist.values, names=category_dist.index))
+    return [f.to_json() for f in figures]
+
+
+class Timer:
+    """
+    Runs named stages `repeat` times and records min/median wall time.
+    """
+
+    def __init__(self, scale, repeat):
+        self.scale = scale
+        self.repeat = repeat
+        self.results = []
+
+    def stage(self, name, func, repeat=None):
+        times = []
+        value = None
+        for _ in range(repeat or self.repeat):
+            start = time.perf_counter()
+            value = func()
+            times.append(time.perf_counter() - start)
+        self.results.append({
+            'rows': self.scale,
+            'stage': name,
+            'seconds_min': min(times),
+            'seconds_median': statistics.median(times),
+            'runs': len(times),
+            'rows_out': profiler.rows_of(value),
+        })
+        print(f"{self.scale:>12,} {name:<20} {min(times) * 1000:>10.1f} ms")
+        return value
+
+
+def run_scale(rows, work_dir, repeat, seed):
+    """
+    Times every pipeline stage on a synthetic dataset of `rows` rows.
+    """
+    csv_path = os.path.join(work_dir, f'synthetic_{rows}.csv')
+    if not os.path.exists(csv_path):
+        synth.write_csv(csv_path, rows, seed=seed)
+
+    t = Timer(rows, repeat)
+    raw = t.stage('read_csv', lambda: pd.read_csv(csv_path), repeat=1)
+    frame = t.stage('preprocess', lambda: store.preprocess(raw.copy()), repeat=1)
+    t.stage('compact', lambda: store.compact(frame), repeat=1)
+    del raw, frame
+    t.stage('ingest', lambda: store.ingest(csv_path, force=True), repeat=1)
+    frame = t.stage('load', lambda: store.read_months(csv_path))
+    shared = t.stage('build_dataset', lambda: dataset.SharedDataset(frame), repeat=1)
+    t.stage('build_row_index', lambda: shared.index, repeat=1)
+
+    manufacturers = shared.manufacturers[:10]
+    selection = t.stage('filter', lambda: shared.select(shared.years, shared.categories, manufacturers))
+    states = shared.states[:3]
+    rtos = shared.rtos_in(states)[:5]
+    t.stage('filter_rto', lambda: shared.select(shared.years, shared.categories, manufacturers, states, rtos))
+
+    t.stage('kpis', selection.kpis)
+    agg = t.stage('summary', lambda: views.summary(selection, True))
+    t.stage('top_manufacturers', lambda: views.top_manufacturers(agg))
+    t.stage('state_summary', lambda: selection.rollup('State Name (state_name)').nlargest(10))
+    t.stage('category_dist', lambda: selection.rollup('Vehicle Category'))
+    keys = views.growth_keys(True)
+    t.stage('growth_yoy', lambda: growth.period_growth(selection.cells, 'year', keys))
+    t.stage('growth_qoq', lambda: growth.period_growth(selection.cells, 'quarter', keys))
+    t.stage('growth_mom', lambda: growth.period_growth(selection.cells, 'month', ['Vehicle Category']))
+    computed = t.stage('compute_views', lambda: views.compute_views(selection, True))
+    t.stage('figures', lambda: build_figures(computed))
+    return t.results
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints per-stage ratios against a previous results file.
+    Returns the stages that got slower than `threshold` times the baseline.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['rows'], r['stage']): r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\n{'rows':>12} {'stage':<20} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for r in results:
+        old = baseline.get((r['rows'], r['stage']))
+        if not old or not old['seconds_min']:
+            continue
+        ratio = r['seconds_min'] / old['seconds_min']
+        flag = ' <-- slower' if ratio > threshold else ''
+        print(f"{r['rows']:>12,} {r['stage']:<20} {old['seconds_min'] * 1000:>10.1f} "
+              f"{r['seconds_min'] * 1000:>10.1f} {ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(r)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the dashboard pipeline on synthetic data at several scales.")
+    parser.add_argument('--rows', type=float, nargs='+', default=[1e5, 1e6])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per fast stage; the minimum is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="where synthetic CSVs and stores are kept (default: a temp dir)")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', metavar='BASELINE_JSON', help="report ratios against an earlier run")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='vahan_bench_')
+    results = []
+    for rows in args.rows:
+        results.extend(run_scale(int(rows), work_dir, args.repeat, args.seed))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import growth
+
+# Per-figure budgets. Past MAX_TRACES the smallest series are merged into
+# "Other"; past MAX_POINTS each trace is downsampled; past WEBGL_POINTS
+# lines are drawn with WebGL.
+MAX_TRACES = 24
+MAX_POINTS = 5000
+WEBGL_POINTS = 1000
+OTHER = 'Other'
+OTHER_COLOR = '#9e9e9e'
+DASHES = ['solid', 'dot', 'dash', 'longdash', 'dashdot', 'longdashdot']
+GRID = dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+LEGEND_ON_TOP = dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+
+# Layout shared by every dashboard figure, layered over plotly's default.
+pio.templates['vahan'] = go.layout.Template(layout=dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(family="Arial, sans-serif", size=12),
+    title_font_size=14,
+    hovermode='x unified',
+    xaxis=GRID,
+    yaxis=GRID,
+))
+TEMPLATE = 'plotly+vahan'
+
+
+def payload_bytes(fig):
+    """
+    Returns the size of the JSON spec sent to the browser for fig.
+    """
+    return len(pio.to_json(fig, validate=False).encode())
+
+
+def lttb_indices(y, n):
+    """
+    Returns the positions of n points of y picked by Largest-Triangle-Three-
+    Buckets, which keeps peaks and troughs that plain striding would drop.
+    The first and last points are always kept.
+    """
+    size = len(y)
+    if n >= size:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1][:max(n, 1)])
+    y = np.asarray(y, dtype=float)
+    x = np.arange(size, dtype=float)
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    chosen = [0]
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        following = slice(end, edges[i + 2] if i + 3 < n else size)
+        avg_x, avg_y = x[following].mean(), y[following].mean()
+        a = chosen[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        chosen.append(start + int(area.argmax()))
+    chosen.append(size - 1)
+    return np.array(chosen)
+
+
+def _top(frame, column, n, value):
+    totals = frame.groupby(column, observed=True)[value].sum()
+    return totals.nlargest(n).index, len(totals)
+
+
+def merge_small(frame, column, limit, value='Registrations'):
+    """
+    Sums the rows of all but the limit - 1 largest column values into OTHER,
+    leaving at most limit values. Returns (frame, distinct values before).
+    """
+    keep, total = _top(frame, column, limit - 1, value)
+    if total <= limit:
+        return frame, total
+    keys = [c for c in frame.columns if c != value and c != column]
+    labels = frame[column].astype(object).where(frame[column].isin(keep), OTHER)
+    merged = frame.assign(**{column: labels}).groupby(keys + [column], observed=True, sort=False)[value].sum()
+    return merged.reset_index()[frame.columns], total
+
+
+def fit_growth(table, period, color, dash=None, max_traces=MAX_TRACES):
+    """
+    Merges the smallest color (and dash) groups of period_growth output into
+    OTHER until the chart has at most max_traces lines, recomputing growth
+    for the merged rows. Returns (table, notes about what was merged).
+    """
+    notes = []
+    if table.empty:
+        return table, notes
+    keys = [color] + ([dash] if dash else [])
+    dash_count = 1
+    if dash:
+        # Only a handful of dash styles are distinguishable.
+        dash_limit = min(len(DASHES), max_traces)
+        keep, total = _top(table, dash, dash_limit - 1, 'Registrations')
+        if total > dash_limit:
+            labels = table[dash].astype(object).where(table[dash].isin(keep), OTHER)
+            table = growth.regroup(table.assign(**{dash: labels}), period, keys)
+            notes.append(f"top {dash_limit - 1} of {total} {dash.lower()} values")
+        dash_count = table[dash].nunique()
+    color_limit = max(1, max_traces // dash_count)
+    keep, total = _top(table, color, color_limit - 1, 'Registrations')
+    if total > color_limit:
+        labels = table[color].astype(object).where(table[color].isin(keep), OTHER)
+        table = growth.regroup(table.assign(**{color: labels}), period, keys)
+        notes.append(f"top {color_limit - 1} of {total} {color.lower()} values")
+    return table, notes
+
+
+def downsample(frame, x, y, series, max_points=MAX_POINTS):
+    """
+    Keeps at most max_points rows in total, split evenly across the series
+    and chosen per series with LTTB. Rows must be ordered by x within a series.
+    """
+    if len(frame) <= max_points:
+        return frame
+    groups = frame.groupby(series, observed=True, sort=False).indices
+    per_series = max(2, max_points // len(groups))
+    positions = [
+        rows[lttb_indices(frame[y].to_numpy()[rows], per_series)]
+        for rows in groups.values()
+    ]
+    return frame.iloc[np.sort(np.concatenate(positions))]
+
+
+def lines(frame, x, y, color, dash=None, title=None, y_suffix='', max_points=MAX_POINTS):
+    """
+    Builds a line chart with one trace per color (x dash) group. Large charts
+    are downsampled and switched to WebGL. Uses graph_objects directly,
+    which is much faster than plotly.express for many traces.
+    """
+    keys = [color] + ([dash] if dash else [])
+    frame = downsample(frame, x, y, keys, max_points)
+    trace = go.Scattergl if len(frame) > WEBGL_POINTS else go.Scatter
+    palette = px.colors.qualitative.Plotly
+    colors = {}
+    for value in pd.unique(frame[color]):
+        colors[value] = OTHER_COLOR if value == OTHER else palette[len(colors) % len(palette)]
+    dashes = {v: DASHES[i % len(DASHES)] for i, v in enumerate(pd.unique(frame[dash]))} if dash else {}
+
+    fig = go.Figure()
+    for key, part in frame.groupby(keys, observed=True, sort=False):
+        key = key if isinstance(key, tuple) else (key,)
+        name = ', '.join(str(k) for k in key)
+        fig.add_trace(trace(
+            x=part[x].to_numpy(),
+            y=part[y].to_numpy(),
+            name=name,
+            legendgroup=name,
+            mode='lines+markers',
+            line=dict(color=colors[key[0]], dash=dashes.get(key[1], 'solid') if dash else 'solid'),
+            hovertemplate=f"{name}: %{{y:.1f}}{y_suffix}<extra></extra>",
+        ))
+    fig.update_layout(template=TEMPLATE, title=title, legend_title_text=', '.join(keys))
+    fig.update_xaxes(title_text=x)
+    fig.update_yaxes(title_text=y)
+    if frame[x].dtype == object or isinstance(frame[x].dtype, pd.StringDtype):
+        # Period labels sort chronologically as text.
+        fig.update_xaxes(type='category', categoryorder='category ascending')
+    return fig
+
+
+def growth_lines(table, period, color, dash=None, title=None, max_traces=MAX_TRACES, max_points=MAX_POINTS):
+    """
+    Growth-% line chart for period_growth output within the trace and point
+    budgets. Returns (fig, note); note describes any merging, else None.
+    """
+    table, notes = fit_growth(table, period, color, dash, max_traces)
+    fig = lines(table.dropna(), growth.PERIOD_COLUMNS[period], growth.growth_column(period),
+                color, dash, title, y_suffix='%', max_points=max_points)
+    note = f"Showing the {' and '.join(notes)}; the rest are grouped as {OTHER}." if notes else None
+    return fig, note
+
+
+def bars(frame, x, y, color, title=None, palette=None, max_traces=MAX_TRACES):
+    """
+    Grouped bar chart, merging all but the largest color groups into OTHER.
+    """
+    frame, _ = merge_small(frame, color, max_traces, y)
+    fig = px.bar(
+        frame,
+        x=x,
+        y=y,
+        color=color,
+        barmode='group',
+        title=title,
+        color_discrete_sequence=palette,
+        color_discrete_map={OTHER: OTHER_COLOR},
+        hover_data={y: ':,.0f'},
+    )
+    fig.update_layout(template=TEMPLATE, title_font_size=16, legend=LEGEND_ON_TOP)
+    return fig
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import store
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ('lazy', 'warm')
+
+
+def child(mode, spawned):
+    """
+    Runs in a fresh interpreter: optionally warms like startup.py, then
+    renders the default page once and again. Prints the timings as JSON.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    timings = {'interpreter_s': time.time() - spawned}
+    if mode == 'warm':
+        import startup
+        timings['warm_stages'] = startup.warm()
+    # With startup.py the server only reports healthy from here on.
+    timings['boot_s'] = time.time() - spawned
+    app = AppTest.from_file(os.path.join(HERE, 'app.py'), default_timeout=3600)
+    start = time.perf_counter()
+    app.run()
+    timings['first_render_s'] = time.perf_counter() - start
+    timings['time_to_first_render_s'] = time.time() - spawned
+    start = time.perf_counter()
+    app.run()
+    timings['second_render_s'] = time.perf_counter() - start
+    timings['errors'] = [e.value for e in app.exception]
+    print(json.dumps(timings))
+
+
+def run_once(mode, env):
+    """
+    Starts a fresh interpreter in mode and returns its timings.
+    """
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, '--spawned', repr(time.time())],
+        env=env, cwd=HERE, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the dashboard's time-to-first-render from a fresh process, "
+                    "started plainly (lazy) and through startup.py (warm)."
+    )
+    parser.add_argument('csv', nargs='?', help="VAHAN export to serve (default: auto-detect)")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--repeat', type=int, default=3, help="fresh processes per mode; the median is reported")
+    parser.add_argument('--backend', help="query backend (default: $VAHAN_BACKEND)")
+    parser.add_argument('--no-store', action='store_true',
+                        help="delete the month partitions before each run, as on a fresh deploy")
+    parser.add_argument('--output', default='coldstart_results.json')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--spawned', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.spawned)
+        return
+
+    csv_path = os.path.abspath(args.csv) if args.csv else store.find_source_csv(HERE)
+    if csv_path is None:
+        sys.exit("No VAHAN CSV found.")
+    env = dict(os.environ, VAHAN_CSV=csv_path)
+    if args.backend:
+        env['VAHAN_BACKEND'] = args.backend
+
+    results = {}
+    for mode in args.modes:
+        runs = []
+        for _ in range(args.repeat):
+            if args.no_store:
+                shutil.rmtree(store.cache_dir(csv_path), ignore_errors=True)
+            runs.append(run_once(mode, env))
+            if runs[-1]['errors']:
+                sys.exit(f"{mode}: the app raised {runs[-1]['errors']}")
+        results[mode] = {
+            key: statistics.median(r[key] for r in runs)
+            for key in ('boot_s', 'first_render_s', 'time_to_first_render_s', 'second_render_s')
+        }
+        results[mode]['runs'] = runs
+        print(f"{mode:>5}: healthy after {results[mode]['boot_s']:6.2f} s, "
+              f"first render {results[mode]['first_render_s']:6.2f} s, "
+              f"time to first render {results[mode]['time_to_first_render_s']:6.2f} s, "
+              f"next render {results[mode]['second_render_s']:6.2f} s")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'csv': csv_path,
+            'csv_bytes': os.path.getsize(csv_path),
+            'backend': env.get('VAHAN_BACKEND', 'pandas'),
+            'no_store': args.no_store,
+            'modes': results,
+        }, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
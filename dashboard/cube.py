@@ -0,0 +1,350 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import drilldown
+import filters
+import growth
+import sketch
+import store
+
+STATE = 'State Name (state_name)'
+RTO = 'RTO Name (office_name)'
+
+# Cube grain: one cell per Month x State x Vehicle Category x Manufacturer.
+# Months are integer codes (see growth.month_codes); Year and Quarter are
+# functions of the month and ride along as extra keys so the sidebar filters
+# and period rollups never have to recompute them.
+TIME_KEYS = ['Year', 'Quarter', 'MonthCode']
+
+
+def _dimensions(df):
+    return [c for c in (STATE, 'Vehicle Category', 'Manufacturer') if c in df.columns]
+
+
+FILTER_KEYS = ['Year', 'Vehicle Category', 'Manufacturer', STATE]
+
+# 'bitset' counts RTOs exactly; 'hll' trades a few percent of accuracy for
+# sketches whose size does not grow with the number of RTOs. States are few
+# enough to always be counted exactly.
+DISTINCT_MODE = os.environ.get('VAHAN_DISTINCT_COUNTS', 'bitset')
+
+
+def selections(years, categories, manufacturers=None, states=None):
+    """
+    Maps the sidebar selection onto {column: values} for FilterIndex.select.
+    """
+    return {
+        'Year': years,
+        'Vehicle Category': categories,
+        'Manufacturer': manufacturers,
+        STATE: states,
+    }
+
+
+def rtos_by_state(pairs):
+    """
+    Returns {state: sorted RTO names} from distinct state/RTO pairs, with
+    every RTO under None.
+    """
+    pairs = pairs.dropna(subset=[RTO])
+    names = {None: sorted(pairs[RTO].unique())}
+    if STATE in pairs.columns:
+        for state, group in pairs.dropna(subset=[STATE]).groupby(STATE, observed=True):
+            names[state] = sorted(group[RTO].unique())
+    return names
+
+
+def rtos_in(names, states):
+    """
+    Returns the sorted RTO names of any of the given states from an
+    rtos_by_state map; None means every state.
+    """
+    if states is None:
+        return names[None]
+    return sorted(set().union(*(names.get(s, []) for s in states)))
+
+
+def _build_cells(df, month):
+    dims = _dimensions(df)
+    keys = [df['Year'], df['Quarter'], month.rename('MonthCode')] + [df[c] for c in dims]
+    return (
+        df.groupby(keys, dropna=False, observed=True)['Registrations']
+        .agg(Registrations='sum', Records='size', Counted='count')
+        .reset_index()
+    )
+
+
+def _month_dates(df, month):
+    # First and last date per month code, so date bounds survive a refresh
+    # without rescanning the months it did not touch.
+    return df['Date'].groupby(month).agg(['min', 'max'])
+
+
+def _merge_codes(codes, added):
+    # Keeps the smallest code per name, like drilldown.code_map.
+    merged = dict(codes)
+    for name, code in added.items():
+        if name not in merged or code < merged[name]:
+            merged[name] = code
+    return merged
+
+
+def _build_rtos(df):
+    # Registrations per filterable key and RTO, kept separately because RTO
+    # is not part of the cube grain. Feeds the distinct-count sketches and
+    # the RTO level of the drill-down.
+    filter_keys = [c for c in FILTER_KEYS if c in df.columns]
+    keys = filter_keys + ([RTO] if RTO in df.columns else [])
+    return (
+        df.groupby(keys, dropna=False, observed=True, sort=False)['Registrations']
+        .sum()
+        .reset_index()
+    )
+
+
+def _build_distinct(rtos, mode, layout=None):
+    """
+    Returns (groups, {column: sketch}, layout) for the distinct-count KPIs.
+    groups has one row per distinct filter key combination in rtos; the
+    sketches count distinct states and RTOs over any set of group positions.
+    layout holds the state and RTO codes the sketches use. Passing an earlier
+    layout builds sketches that concatenate with the earlier ones, or
+    returns None if rtos has names the layout lacks.
+    """
+    keys = [c for c in FILTER_KEYS if c in rtos.columns]
+    group_ids = rtos.groupby(keys, dropna=False, observed=True, sort=False).ngroup().to_numpy()
+    _, first = np.unique(group_ids, return_index=True)
+    groups = rtos[keys].iloc[first].reset_index(drop=True)
+    if layout is None:
+        layout = {}
+        for column in (STATE, RTO):
+            if column in rtos.columns:
+                layout[column] = pd.Index(sketch.codes_of(rtos[column])[1], dtype=object)
+    codes = {}
+    for column in (STATE, RTO):
+        if column not in layout:
+            continue
+        names = layout[column]
+        codes[column] = names.get_indexer(rtos[column].astype(object))
+        if ((codes[column] < 0) & rtos[column].notna().to_numpy()).any():
+            return None
+    distinct = {}
+    if STATE in codes:
+        distinct[STATE] = sketch.BitsetSketch(group_ids, codes[STATE], len(groups), n_members=len(layout[STATE]))
+    if RTO in codes:
+        offices = codes[RTO]
+        if 'blocks' not in layout and STATE in codes:
+            # Block RTOs by state (unknown state last) so each group stores
+            # bits only for the states it covers.
+            blocks = np.zeros(len(layout[RTO]), dtype=np.int64)
+            known = offices >= 0
+            state_block = np.where(codes[STATE] < 0, len(layout[STATE]), codes[STATE])
+            blocks[offices[known][::-1]] = state_block[known][::-1]
+            layout['blocks'] = blocks
+        distinct[RTO] = sketch.build(
+            mode, group_ids, offices, len(groups), layout.get('blocks'), n_members=len(layout[RTO])
+        )
+    return groups, distinct, layout
+
+
+class CubeSlice:
+    """
+    The cube cells matching one filter selection.
+    All dashboard views are answered from here without touching raw rows.
+    """
+
+    def __init__(self, cube, chosen, cells, groups):
+        self.cube = cube
+        self.chosen = chosen
+        self.cells = cells
+        self.groups = groups
+
+    def rollup(self, by):
+        """
+        Sums Registrations over the given keys, like filtered.groupby(by).sum().
+        """
+        if isinstance(by, str):
+            return self.cells.groupby(by, observed=True)['Registrations'].sum()
+        return self.cells.groupby(by, as_index=False, observed=True)['Registrations'].sum()
+
+    def kpis(self):
+        """
+        Returns total, average per record, states covered and RTO offices.
+        Distinct counts merge the sketches of the selected groups.
+        """
+        distinct = self.cube.distinct
+        total = self.cells['Registrations'].sum()
+        counted = self.cells['Counted'].sum()
+        return {
+            'total': total,
+            'average': total / counted if counted else np.nan,
+            'states': distinct[STATE].count(self.groups) if STATE in distinct else 0,
+            'rtos': distinct[RTO].count(self.groups) if RTO in distinct else 0,
+        }
+
+    def state_level(self):
+        """
+        The state level of the drill-down (see drilldown.state_table), from
+        the cells and the per-state RTO sketches of the selected groups.
+        """
+        offices = {}
+        if RTO in self.cube.distinct and STATE in self.cells.columns and len(self.groups):
+            # Split the selected groups by state and merge each part's sketches.
+            codes = self.cube._group_states[self.groups]
+            order = np.argsort(codes, kind='stable')
+            codes, groups = codes[order], self.groups[order]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            for start, part in zip(starts, np.split(groups, starts[1:])):
+                if codes[start] >= 0:
+                    offices[self.cube._group_state_names[codes[start]]] = self.cube.distinct[RTO].count(part)
+        if STATE in self.cells.columns:
+            totals = self.rollup(STATE)
+        else:
+            totals = pd.Series(dtype=float, index=pd.Index([], name=STATE))
+        return drilldown.state_table(totals, offices, self.cube.state_codes)
+
+    def rto_level(self, state_code):
+        """
+        The RTO level of the drill-down for one state code. Only that state's
+        rows of the RTO aggregates are read, however many RTOs there are.
+        """
+        rtos = self.cube.rtos.take(self.cube.rto_positions(state_code))
+        keep = np.ones(len(rtos), dtype=bool)
+        for column, values in self.chosen.items():
+            if values is not None and column in rtos.columns:
+                keep &= rtos[column].isin(values).to_numpy()
+        rtos = rtos[keep]
+        if RTO in rtos.columns:
+            totals = rtos.groupby(RTO, observed=True)['Registrations'].sum()
+        else:
+            totals = pd.Series(dtype=float, index=pd.Index([], name=RTO))
+        return drilldown.rto_table(totals, self.cube.rto_codes)
+
+
+class RollupCube:
+    """
+    Pre-aggregated registrations at Month x State x Vehicle Category x Manufacturer grain.
+    Built once at load time; filter changes only slice and sum cells.
+    """
+
+    def __init__(self, df, mode=None):
+        self.mode = mode or DISTINCT_MODE
+        month = growth.month_codes(df['Date'])
+        self.cells = _build_cells(df, month)
+        self.rtos = _build_rtos(df)
+        self._dates = _month_dates(df, month)
+        self.state_codes = drilldown.code_map(df, STATE, drilldown.STATE_CODE)
+        self.rto_codes = drilldown.code_map(df, RTO, drilldown.RTO_CODE)
+        self.records = len(df)
+        self._groups, self.distinct, self._layout = _build_distinct(self.rtos, self.mode)
+        self._finish()
+
+    def _finish(self):
+        # Everything here is derived from the aggregates, never from rows.
+        self._cell_index = filters.FilterIndex(self.cells, FILTER_KEYS)
+        groups = self._groups
+        self._group_index = filters.FilterIndex(groups, FILTER_KEYS)
+        if STATE in groups.columns:
+            self._group_states, self._group_state_names = sketch.codes_of(groups[STATE])
+        # Drill-down index: rows of self.rtos per state code.
+        self._rto_rows = {}
+        if STATE in self.rtos.columns:
+            by_name = filters.FilterIndex(self.rtos, [STATE])
+            for name in by_name.values(STATE):
+                code = self.state_codes.get(name, name)
+                self._rto_rows.setdefault(code, []).append(by_name.positions(STATE, [name]))
+        # Sidebar RTO options per state, built on first use.
+        self._rto_names = None
+        self.date_min = self._dates['min'].min()
+        self.date_max = self._dates['max'].max()
+        self.states = self.distinct[STATE].total if STATE in self.distinct else 0
+
+    def with_months(self, month_codes, rows, year_rows, records):
+        """
+        Returns a new cube with the given months rebuilt from rows, their
+        complete new contents; None stands for undated rows. Cells of other
+        months are reused as they are. RTO aggregates have no month, so those
+        of the affected years are rebuilt from year_rows, every row of those
+        years after the update. records is the updated dataset's row count.
+        Code maps only gain names: a name whose rows were all replaced keeps
+        its entry, which lookups by present names never see.
+        """
+        dated = [c for c in month_codes if c is not None]
+        undated = len(dated) < len(month_codes)
+        stale = self.cells['MonthCode'].isin(dated)
+        if undated:
+            stale |= self.cells['MonthCode'].isna()
+        years = sorted({c // 12 for c in dated})
+        stale_rtos = self.rtos['Year'].isin(years)
+        if undated:
+            stale_rtos |= self.rtos['Year'].isna()
+        month = growth.month_codes(rows['Date'])
+
+        updated = RollupCube.__new__(RollupCube)
+        updated.mode = self.mode
+        updated.cells = store.concat_frames([self.cells[~stale], _build_cells(rows, month)])
+        updated.rtos = store.concat_frames([self.rtos[~stale_rtos], _build_rtos(year_rows)])
+        updated._dates = pd.concat([self._dates.drop(dated, errors='ignore'), _month_dates(rows, month)])
+        updated.state_codes = _merge_codes(self.state_codes, drilldown.code_map(rows, STATE, drilldown.STATE_CODE))
+        updated.rto_codes = _merge_codes(self.rto_codes, drilldown.code_map(rows, RTO, drilldown.RTO_CODE))
+        updated.records = records
+        # Sketch groups carry the year, so those of other years are kept
+        # unless new states or RTOs change the sketch layout.
+        new_rtos = updated.rtos.iloc[int((~stale_rtos).sum()):]
+        built = _build_distinct(new_rtos, self.mode, self._layout)
+        if built is None:
+            updated._groups, updated.distinct, updated._layout = _build_distinct(updated.rtos, self.mode)
+        else:
+            stale_groups = self._groups['Year'].isin(years)
+            if undated:
+                stale_groups |= self._groups['Year'].isna()
+            kept = np.flatnonzero(~stale_groups.to_numpy())
+            groups, distinct, updated._layout = built
+            updated._groups = store.concat_frames([self._groups.iloc[kept], groups])
+            updated.distinct = {
+                column: type(part).concat([self.distinct[column].take(kept), part])
+                for column, part in distinct.items()
+            }
+        updated._finish()
+        return updated
+
+    def rto_positions(self, state_code):
+        """
+        Returns the sorted positions in self.rtos of the rows of one state code.
+        """
+        parts = self._rto_rows.get(state_code, [])
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def rtos_in(self, states):
+        """
+        Returns the sorted RTO names registered in any of the given states,
+        from the RTO aggregates rather than the raw rows.
+        """
+        if RTO not in self.rtos.columns:
+            return []
+        if self._rto_names is None:
+            columns = [c for c in (STATE, RTO) if c in self.rtos.columns]
+            self._rto_names = rtos_by_state(self.rtos[columns].drop_duplicates())
+        return rtos_in(self._rto_names, states)
+
+    def values(self, column):
+        """
+        Returns the sorted distinct values of a cube dimension.
+        """
+        return sorted(self.cells[column].dropna().unique())
+
+    def select(self, years, categories, manufacturers=None, states=None):
+        """
+        Returns the CubeSlice for the sidebar selection.
+        """
+        chosen = selections(years, categories, manufacturers, states)
+        return CubeSlice(
+            self,
+            chosen,
+            self.cells.take(self._cell_index.select(chosen)),
+            self._group_index.select(chosen),
+        )
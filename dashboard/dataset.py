@@ -0,0 +1,279 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import cube
+import filters
+import store
+
+# pandas 3 always copies on write; older versions need it switched on so a
+# session can never modify the shared frame through a view.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# 'pandas' loads the data into memory; 'duckdb' queries the partition files
+# in place (see duckdb_backend.py).
+BACKENDS = ('pandas', 'duckdb')
+
+
+class _Snapshot:
+    """
+    One consistent state of the dataset: the frame, the cube built from it,
+    its partitions and the row index over that frame. refresh replaces the
+    whole snapshot at once and never modifies one.
+    """
+
+    def __init__(self, frame, rollup_cube, version, partitions, spans):
+        self.frame = frame
+        self.cube = rollup_cube
+        self.version = version
+        self.partitions = partitions
+        # Rows of each partition are contiguous in frame: {key: (start, stop)}.
+        self.spans = spans
+        self.memory_bytes = store.footprint(frame)
+        self.years = rollup_cube.values('Year')
+        self.categories = rollup_cube.values('Vehicle Category')
+        self.manufacturers = (
+            rollup_cube.values('Manufacturer') if 'Manufacturer' in frame.columns else []
+        )
+        self.states = rollup_cube.values(cube.STATE) if cube.STATE in frame.columns else []
+        # Built on first RTO-level query so refreshes do not pay for it.
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = filters.FilterIndex(self.frame, cube.FILTER_KEYS + [cube.RTO])
+        return self._index
+
+
+class SharedDataset:
+    """
+    Read-only VAHAN dataset, loaded once per process and shared by all sessions.
+
+    All derived columns are computed at ingest time, so nothing is added or
+    modified per session. Contract for callers:
+
+    - Zero-copy: ``frame[col]``, ``frame[[cols]]``, ``frame.iloc[a:b]`` and
+      ``frame.loc[:, cols]`` return views over the shared buffers. Under
+      copy-on-write, writing to one of them copies first, never touching the
+      shared data.
+    - Copies: boolean masks, ``isin`` filters, ``take``/fancy indexing, sorts
+      and groupbys allocate new frames sized to their result. Use ``cube``
+      slices rather than filtering ``frame`` in per-rerun code.
+    - Never assign to ``frame`` or ``cube.cells`` in place. ``refresh`` swaps
+      in a new snapshot of frame, cube and row index in one assignment;
+      objects already handed out stay valid. Methods that use more than one
+      of them read the snapshot once, so a refresh never mixes two versions.
+    """
+
+    backend = 'pandas'
+
+    def __init__(self, frame, version=None, csv_path=None, partitions=None, sizes=None):
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        spans = _spans(sorted(sizes), sizes) if sizes else {}
+        self._snapshot = _Snapshot(frame, cube.RollupCube(frame), version, partitions or {}, spans)
+
+    @property
+    def frame(self):
+        return self._snapshot.frame
+
+    @property
+    def cube(self):
+        return self._snapshot.cube
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    @property
+    def memory_bytes(self):
+        return self._snapshot.memory_bytes
+
+    @property
+    def years(self):
+        return self._snapshot.years
+
+    @property
+    def categories(self):
+        return self._snapshot.categories
+
+    @property
+    def manufacturers(self):
+        return self._snapshot.manufacturers
+
+    @property
+    def states(self):
+        return self._snapshot.states
+
+    @property
+    def empty(self):
+        return self._snapshot.frame.empty
+
+    @property
+    def records(self):
+        return self._snapshot.cube.records
+
+    @property
+    def date_min(self):
+        return self._snapshot.cube.date_min
+
+    @property
+    def date_max(self):
+        return self._snapshot.cube.date_max
+
+    @property
+    def state_count(self):
+        return self._snapshot.cube.states
+
+    @property
+    def index(self):
+        """
+        Row-level FilterIndex over the filterable columns, built on first use.
+        """
+        return self._snapshot.index
+
+    def refresh(self, max_age=0):
+        """
+        Applies new or changed month partitions and returns their keys.
+
+        The source CSV is re-synced first (a stat call when unchanged), then
+        partitions are compared with the ones loaded. Only changed months are
+        read; the frame keeps every other month's rows, found by position
+        rather than by recomputing month codes, and the cube rebuilds only the
+        affected months. Cached results stay valid for selections of other
+        years (see version_for). Checks closer than max_age seconds apart are
+        skipped.
+        """
+        if self.csv_path is None or time.monotonic() - self._checked_at < max_age:
+            return []
+        with self._lock:
+            self._checked_at = time.monotonic()
+            store.ingest(self.csv_path)
+            meta = store.cache_info(self.csv_path)
+            if meta is None:
+                return []
+            old = self._snapshot
+            current = {k: p['hash'] for k, p in meta['partitions'].items()}
+            changed = sorted(
+                k for k in set(current) | set(old.partitions)
+                if current.get(k) != old.partitions.get(k)
+            )
+            if not changed:
+                return []
+
+            rows = store.read_months(self.csv_path, changed)
+            if not len(rows.columns):
+                # Only removed months: no new rows.
+                rows = old.frame.iloc[:0]
+            codes = [store.partition_code(k) for k in changed]
+            # Drops the changed months by position; new rows go at the end.
+            kept = sorted((span, k) for k, span in old.spans.items() if k not in changed)
+            if len(kept) < len(old.spans):
+                keep = np.zeros(len(old.frame), dtype=bool)
+                for (start, stop), _ in kept:
+                    keep[start:stop] = True
+                frame = store.concat_frames([old.frame[keep], rows])
+            else:
+                frame = store.concat_frames([old.frame, rows])
+            sizes = {k: meta['partitions'][k]['rows'] for k in changed if k in meta['partitions']}
+            kept_sizes = {k: stop - start for (start, stop), k in kept}
+            spans = _spans([k for _, k in kept] + sorted(sizes), {**kept_sizes, **sizes})
+
+            # The RTO aggregates are per year, so they need every row of the affected years.
+            years = {_year_of(k) for k in changed}
+            affected = [np.arange(*span) for k, span in spans.items() if _year_of(k) in years]
+            year_rows = frame.take(np.concatenate(affected)) if affected else frame.iloc[:0]
+            rollup = old.cube.with_months(codes, rows, year_rows, len(frame))
+            self._snapshot = _Snapshot(frame, rollup, store.dataset_version(meta), current, spans)
+            return changed
+
+    def version_for(self, years):
+        """
+        Version of the rows of the given years only. Results keyed by it
+        stay valid when a refresh changes other years.
+        """
+        snapshot = self._snapshot
+        if not snapshot.partitions:
+            return snapshot.version
+        return store.years_version(snapshot.partitions, years)
+
+    def rtos_in(self, states):
+        """
+        Returns the sorted RTO names registered in any of the given states.
+        """
+        return self.cube.rtos_in(states)
+
+    def rows(self, years, categories, manufacturers=None, states=None, rtos=None, chunk_rows=100_000):
+        """
+        Returns (row count, iterator of DataFrame chunks) over the raw rows of
+        a sidebar selection. Each chunk is copied only when it is reached, so
+        the selection is never held in memory twice.
+        """
+        chosen = cube.selections(years, categories, manufacturers, states)
+        chosen[cube.RTO] = rtos or None
+        snapshot = self._snapshot
+        positions = snapshot.index.select(chosen)
+        frame = snapshot.frame
+        chunks = (frame.take(positions[i:i + chunk_rows]) for i in range(0, max(len(positions), 1), chunk_rows))
+        return len(positions), chunks
+
+    def select(self, years, categories, manufacturers=None, states=None, rtos=None):
+        """
+        Returns the CubeSlice for a sidebar selection.
+        Without an RTO filter this is a slice of the shared cube. RTO is finer
+        than the cube grain, so an RTO filter looks up the matching rows in the
+        row index and rolls up just those.
+        """
+        snapshot = self._snapshot
+        if not rtos:
+            return snapshot.cube.select(years, categories, manufacturers, states)
+        chosen = cube.selections(years, categories, manufacturers, states)
+        chosen[cube.RTO] = rtos
+        rows = snapshot.frame.take(snapshot.index.select(chosen))
+        return cube.RollupCube(rows, snapshot.cube.mode).select(years, categories)
+
+
+def _year_of(key):
+    code = store.partition_code(key)
+    return None if code is None else code // 12
+
+
+def _spans(keys, sizes):
+    # Consecutive (start, stop) positions of each key's rows, in keys order.
+    spans, start = {}, 0
+    for key in keys:
+        spans[key] = (start, start + sizes[key])
+        start += sizes[key]
+    return spans
+
+
+def load_shared(base_dir=None, csv_path=None, backend=None):
+    """
+    Builds the shared dataset from the month partitions, or None if no CSV is
+    found. csv_path defaults to $VAHAN_CSV, else the auto-detected export;
+    backend defaults to $VAHAN_BACKEND, else 'pandas'.
+    """
+    backend = backend or os.environ.get('VAHAN_BACKEND', 'pandas')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+    csv_path = csv_path or os.environ.get('VAHAN_CSV') or store.find_source_csv(base_dir)
+    if csv_path is None:
+        return None
+    store.ingest(csv_path)
+    if backend == 'duckdb':
+        import duckdb_backend
+        return duckdb_backend.DuckDBDataset(csv_path)
+    meta = store.cache_info(csv_path)
+    return SharedDataset(
+        store.read_months(csv_path),
+        version=store.dataset_version(meta),
+        csv_path=csv_path,
+        partitions={k: p['hash'] for k, p in meta['partitions'].items()},
+        sizes={k: p['rows'] for k, p in meta['partitions'].items()},
+    )
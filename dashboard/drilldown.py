@@ -0,0 +1,51 @@
+STATE_CODE = 'State Code (state_code)'
+RTO_CODE = 'RTO Code (office_code)'
+OFFICES = 'RTO Offices'
+SHARE = 'Share %'
+
+
+def code_map(df, name, code):
+    """
+    Returns {name: code} for two columns of df, taking the smallest code when
+    a name has several. Without a code column each name is its own code.
+    """
+    if name not in df.columns:
+        return {}
+    if code not in df.columns:
+        return {n: n for n in df[name].dropna().unique().tolist()}
+    pairs = df[[name, code]].dropna().drop_duplicates().sort_values(code).drop_duplicates(name)
+    return dict(zip(pairs[name].tolist(), pairs[code].tolist()))
+
+
+def names_for(codes, code):
+    """
+    Returns the names mapped to code by a code_map.
+    """
+    return [n for n, c in codes.items() if c == code]
+
+
+def state_table(totals, offices, state_codes):
+    """
+    The state level: registrations, share of the selection and distinct RTO
+    offices per state, largest first. totals is a Series of registrations
+    indexed by state name; offices maps state name to its RTO count.
+    """
+    table = totals.rename('Registrations').reset_index()
+    names = table.iloc[:, 0].astype(object)
+    table.insert(0, STATE_CODE, names.map(state_codes))
+    table[OFFICES] = names.map(offices).fillna(0).astype(int)
+    total = table['Registrations'].sum()
+    table[SHARE] = table['Registrations'] / total * 100 if total else 0.0
+    return table.sort_values('Registrations', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def rto_table(totals, rto_codes):
+    """
+    The RTO level for one state: registrations and share per RTO office,
+    largest first. totals is a Series of registrations indexed by RTO name.
+    """
+    table = totals.rename('Registrations').reset_index()
+    table.insert(0, RTO_CODE, table.iloc[:, 0].astype(object).map(rto_codes))
+    total = table['Registrations'].sum()
+    table[SHARE] = table['Registrations'] / total * 100 if total else 0.0
+    return table.sort_values('Registrations', ascending=False, kind='stable').reset_index(drop=True)
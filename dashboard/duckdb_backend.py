@@ -0,0 +1,339 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+
+import cube
+import drilldown
+import store
+
+TABLE = 'vahan'
+# Recent selections keep their slice, so the sections of one selection
+# share its cells instead of scanning the files again.
+SLICE_CACHE = 16
+MONTH_CODE = 'year("Date") * 12 + month("Date") - 1'
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _partition_schema(paths):
+    # Month files may differ in dictionary index width and numeric types;
+    # scanning them as one dataset needs a schema every file can be cast to.
+    schemas = []
+    for path in paths:
+        with pa.memory_map(path, 'r') as source:
+            schema = ipc.open_file(source).schema
+        schemas.append(pa.schema([
+            pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type), f.nullable)
+            if pa.types.is_dictionary(f.type) else f
+            for f in schema
+        ]))
+    return pa.unify_schemas(schemas, promote_options='permissive')
+
+
+class DuckDBSlice:
+    """
+    One filter selection over the partition files, with the same interface
+    as cube.CubeSlice. Every method compiles to one SQL query whose filters
+    and aggregation run inside DuckDB; only the aggregated result becomes a
+    DataFrame.
+    """
+
+    def __init__(self, backend, where, params):
+        self.backend = backend
+        self.where = where
+        self.params = params
+        self._cells = None
+
+    def _sum(self):
+        return f'COALESCE(SUM("Registrations"), 0)::{self.backend.value_type}'
+
+    @property
+    def cells(self):
+        """
+        Registrations at the cube grain (month x state x category x
+        manufacturer) for this selection, computed on first use.
+        """
+        if self._cells is None:
+            dims = [c for c in (cube.STATE, 'Vehicle Category', 'Manufacturer') if c in self.backend.columns]
+            cells = self.backend.query(
+                f'SELECT "Year", "Quarter", ({MONTH_CODE})::INTEGER AS "MonthCode", '
+                f'{", ".join(_quote(c) for c in dims)}, '
+                f'{self._sum()} AS "Registrations", '
+                f'COUNT(*) AS "Records", COUNT("Registrations") AS "Counted" '
+                f'FROM {TABLE} WHERE {self.where} GROUP BY ALL ORDER BY ALL',
+                self.params,
+            )
+            cells['MonthCode'] = cells['MonthCode'].astype('Int32')
+            self._cells = cells[['Year', 'Quarter', 'MonthCode'] + dims + ['Registrations', 'Records', 'Counted']]
+        return self._cells
+
+    def rollup(self, by):
+        """
+        Sums Registrations over the given keys, like filtered.groupby(by).sum().
+        """
+        keys = [by] if isinstance(by, str) else list(by)
+        if self._cells is not None and all(k in self._cells.columns for k in keys):
+            if isinstance(by, str):
+                return self._cells.groupby(by)['Registrations'].sum()
+            return self._cells.groupby(keys, as_index=False)['Registrations'].sum()
+        quoted = ', '.join(_quote(k) for k in keys)
+        not_null = ' AND '.join(f'{_quote(k)} IS NOT NULL' for k in keys)
+        result = self.backend.query(
+            f'SELECT {quoted}, {self._sum()} AS "Registrations" FROM {TABLE} '
+            f'WHERE {self.where} AND {not_null} GROUP BY ALL ORDER BY {quoted}',
+            self.params,
+        )
+        if isinstance(by, str):
+            return result.set_index(by)['Registrations']
+        return result
+
+    def kpis(self):
+        """
+        Returns total, average per record, states covered and RTO offices.
+        """
+        columns = self.backend.columns
+        states = f'COUNT(DISTINCT {_quote(cube.STATE)})' if cube.STATE in columns else '0'
+        rtos = f'COUNT(DISTINCT {_quote(cube.RTO)})' if cube.RTO in columns else '0'
+        row = self.backend.query(
+            f'SELECT {self._sum()} AS total, COUNT("Registrations") AS counted, '
+            f'{states} AS states, {rtos} AS rtos FROM {TABLE} WHERE {self.where}',
+            self.params,
+        ).iloc[0]
+        total = row['total']
+        return {
+            'total': total,
+            'average': total / row['counted'] if row['counted'] else float('nan'),
+            'states': int(row['states']),
+            'rtos': int(row['rtos']),
+        }
+
+    def state_level(self):
+        """
+        The state level of the drill-down (see drilldown.state_table).
+        """
+        state = _quote(cube.STATE)
+        rtos = f'COUNT(DISTINCT {_quote(cube.RTO)})' if cube.RTO in self.backend.columns else '0'
+        result = self.backend.query(
+            f'SELECT {state}, {self._sum()} AS "Registrations", {rtos} AS offices FROM {TABLE} '
+            f'WHERE {self.where} AND {state} IS NOT NULL GROUP BY 1 ORDER BY 1',
+            self.params,
+        ).set_index(cube.STATE)
+        offices = result['offices'].astype(int).to_dict()
+        return drilldown.state_table(result['Registrations'], offices, self.backend.state_codes)
+
+    def rto_level(self, state_code):
+        """
+        The RTO level of the drill-down for one state code.
+        """
+        names = drilldown.names_for(self.backend.state_codes, state_code)
+        if not names:
+            empty = pd.Series(dtype='int64', index=pd.Index([], name=cube.RTO))
+            return drilldown.rto_table(empty, self.backend.rto_codes)
+        rto = _quote(cube.RTO)
+        result = self.backend.query(
+            f'SELECT {rto}, {self._sum()} AS "Registrations" FROM {TABLE} '
+            f'WHERE {self.where} AND {_quote(cube.STATE)} IN ({", ".join("?" * len(names))}) '
+            f'AND {rto} IS NOT NULL GROUP BY 1 ORDER BY 1',
+            self.params + names,
+        ).set_index(cube.RTO)
+        return drilldown.rto_table(result['Registrations'], self.backend.rto_codes)
+
+
+class DuckDBDataset:
+    """
+    VAHAN dataset queried in place by an embedded DuckDB, for data larger
+    than memory. Drop-in for dataset.SharedDataset in the dashboard.
+
+    The month partitions are scanned as one Arrow dataset. Filters and
+    aggregations are pushed down into DuckDB's multi-threaded scan, so rows
+    are never loaded into pandas and memory follows the size of the results.
+    """
+
+    backend = 'duckdb'
+    memory_bytes = 0
+
+    def __init__(self, csv_path, threads=None):
+        import duckdb
+
+        self.csv_path = csv_path
+        self._db = duckdb.connect(config={'threads': threads} if threads else {})
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._partitions = {}
+        self._slices = OrderedDict()
+        self._open(store.cache_info(csv_path))
+
+    def _open(self, meta):
+        folder = store.cache_dir(self.csv_path)
+        paths = [os.path.join(folder, p['file']) for _, p in sorted(meta['partitions'].items())]
+        self.version = store.dataset_version(meta)
+        self._partitions = {k: p['hash'] for k, p in meta['partitions'].items()}
+        self._slices = OrderedDict()
+        self._rto_names = None
+        if not paths:
+            self._dataset = None
+            self.columns, self.records = [], 0
+            self.years, self.categories, self.manufacturers, self.states = [], [], [], []
+            self.state_codes, self.rto_codes = {}, {}
+            return
+        self._dataset = ds.dataset(paths, format='ipc', schema=_partition_schema(paths))
+        self.columns = self._dataset.schema.names
+        value = self._dataset.schema.field('Registrations').type
+        self.value_type = 'BIGINT' if pa.types.is_integer(value) else 'DOUBLE'
+        stats = self.query(f'SELECT COUNT(*) AS n, MIN("Date") AS lo, MAX("Date") AS hi FROM {TABLE}').iloc[0]
+        self.records = int(stats['n'])
+        self.date_min = pd.Timestamp(stats['lo'])
+        self.date_max = pd.Timestamp(stats['hi'])
+        self.years = self.values('Year')
+        self.categories = self.values('Vehicle Category')
+        self.manufacturers = self.values('Manufacturer') if 'Manufacturer' in self.columns else []
+        self.states = self.values(cube.STATE) if cube.STATE in self.columns else []
+        self.state_codes = self.code_map(cube.STATE, drilldown.STATE_CODE)
+        self.rto_codes = self.code_map(cube.RTO, drilldown.RTO_CODE)
+
+    def query(self, sql, params=None):
+        """
+        Runs sql against the partitions (as table vahan) and returns a DataFrame.
+        Safe to call from several sessions at once.
+        """
+        con = self._db.cursor()
+        try:
+            con.register(TABLE, self._dataset)
+            return con.execute(sql, params or []).df()
+        finally:
+            con.close()
+
+    @property
+    def empty(self):
+        return not self.records
+
+    @property
+    def state_count(self):
+        return len(self.states)
+
+    def values(self, column):
+        """
+        Returns the sorted distinct non-null values of column.
+        """
+        name = _quote(column)
+        values = self.query(f'SELECT DISTINCT {name} AS v FROM {TABLE} WHERE {name} IS NOT NULL ORDER BY 1')['v']
+        return values.tolist()
+
+    def code_map(self, name, code):
+        """
+        Returns {name: smallest code} for two columns, like drilldown.code_map.
+        """
+        if name not in self.columns:
+            return {}
+        if code not in self.columns:
+            return {n: n for n in self.values(name)}
+        pairs = self.query(
+            f'SELECT {_quote(name)} AS n, MIN({_quote(code)}) AS c FROM {TABLE} '
+            f'WHERE {_quote(name)} IS NOT NULL AND {_quote(code)} IS NOT NULL GROUP BY 1'
+        )
+        return dict(zip(pairs['n'].tolist(), pairs['c'].tolist()))
+
+    def refresh(self, max_age=0):
+        """
+        Re-syncs the partitions with the source CSV and returns the changed
+        month keys. Nothing is held in memory, so this only reopens the scan.
+        """
+        if time.monotonic() - self._checked_at < max_age:
+            return []
+        with self._lock:
+            self._checked_at = time.monotonic()
+            store.ingest(self.csv_path)
+            meta = store.cache_info(self.csv_path)
+            if meta is None:
+                return []
+            current = {k: p['hash'] for k, p in meta['partitions'].items()}
+            changed = sorted(
+                k for k in set(current) | set(self._partitions)
+                if current.get(k) != self._partitions.get(k)
+            )
+            if changed:
+                self._open(meta)
+            return changed
+
+    def version_for(self, years):
+        """
+        Version of the rows of the given years only, like SharedDataset.version_for.
+        """
+        return store.years_version(self._partitions, years)
+
+    def rtos_in(self, states):
+        """
+        Returns the sorted RTO names registered in any of the given states.
+        The state/RTO pairs are read once per dataset version.
+        """
+        if cube.RTO not in self.columns:
+            return []
+        if self._rto_names is None:
+            columns = ', '.join(_quote(c) for c in (cube.STATE, cube.RTO) if c in self.columns)
+            self._rto_names = cube.rtos_by_state(self.query(f'SELECT DISTINCT {columns} FROM {TABLE}'))
+        return cube.rtos_in(self._rto_names, states)
+
+    def rows(self, years, categories, manufacturers=None, states=None, rtos=None, chunk_rows=100_000):
+        """
+        Returns (row count, iterator of DataFrame chunks) over the raw rows of
+        a sidebar selection, streamed from DuckDB in record batches.
+        """
+        chosen = cube.selections(years, categories, manufacturers, states)
+        chosen[cube.RTO] = rtos or None
+        where, params = self._where(chosen)
+        total = int(self.query(f'SELECT COUNT(*) AS n FROM {TABLE} WHERE {where}', params)['n'].iloc[0])
+        dataset = self._dataset
+
+        def chunks():
+            con = self._db.cursor()
+            try:
+                con.register(TABLE, dataset)
+                reader = con.execute(f'SELECT * FROM {TABLE} WHERE {where}', params).fetch_record_batch(chunk_rows)
+                empty = True
+                for batch in reader:
+                    empty = False
+                    yield batch.to_pandas()
+                if empty:
+                    # Like SharedDataset.rows, an empty selection is still
+                    # one chunk, so writers know the columns.
+                    yield reader.schema.empty_table().to_pandas()
+            finally:
+                con.close()
+
+        return total, chunks()
+
+    def _where(self, chosen):
+        # None leaves a column unconstrained; IN drops nulls like isin().
+        clauses, params = ['TRUE'], []
+        for column, values in chosen.items():
+            if values is None or column not in self.columns:
+                continue
+            values = [v.item() if hasattr(v, 'item') else v for v in values]
+            if not values:
+                return 'FALSE', []
+            clauses.append(f'{_quote(column)} IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+        return ' AND '.join(clauses), params
+
+    def select(self, years, categories, manufacturers=None, states=None, rtos=None):
+        """
+        Returns the DuckDBSlice for a sidebar selection.
+        """
+        chosen = cube.selections(years, categories, manufacturers, states)
+        chosen[cube.RTO] = rtos or None
+        where, params = self._where(chosen)
+        key = (where, tuple(params))
+        with self._lock:
+            chosen_slice = self._slices.pop(key, None) or DuckDBSlice(self, where, params)
+            self._slices[key] = chosen_slice
+            while len(self._slices) > SLICE_CACHE:
+                self._slices.popitem(last=False)
+        return chosen_slice
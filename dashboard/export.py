@@ -0,0 +1,204 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+MIME_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+FORMATS = list(MIME_TYPES)
+CHUNK_ROWS = 100_000
+# Excel's row limit, less the header; longer exports continue on a new sheet.
+XLSX_SHEET_ROWS = 1_048_575
+
+
+def frame_chunks(frame, chunk_rows=CHUNK_ROWS):
+    """
+    Yields positional slices of frame; a Series is exported as a two-column frame.
+    """
+    if isinstance(frame, pd.Series):
+        frame = frame.reset_index()
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def write_csv(chunks, path, progress=None):
+    """
+    Appends each chunk to a CSV file, writing the header once.
+    """
+    with open(path, 'w', newline='') as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=i == 0, index=False)
+            if progress:
+                progress(len(chunk))
+
+
+def write_parquet(chunks, path, progress=None):
+    """
+    Writes each chunk as one Parquet row group.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema.remove_metadata()
+                writer = pq.ParquetWriter(path, schema)
+            # Later chunks may pick narrower dictionary or integer types.
+            writer.write_table(table.cast(schema) if not table.schema.equals(schema) else table)
+            if progress:
+                progress(len(chunk))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _cells(chunk):
+    # openpyxl wants plain values; missing values become empty cells.
+    plain = chunk.astype(object)
+    return plain.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def write_xlsx(chunks, path, progress=None, sheet='data'):
+    """
+    Streams chunks into an XLSX file with openpyxl's write-only mode, which
+    keeps one row in memory at a time instead of the whole workbook.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet, header, rows, sheets = None, None, XLSX_SHEET_ROWS, 0
+    for chunk in chunks:
+        header = [str(c) for c in chunk.columns]
+        for row in _cells(chunk):
+            if rows == XLSX_SHEET_ROWS:
+                sheets += 1
+                worksheet = workbook.create_sheet(sheet if sheets == 1 else f'{sheet}_{sheets}')
+                worksheet.append(header)
+                rows = 0
+            worksheet.append(row)
+            rows += 1
+        if progress:
+            progress(len(chunk))
+    if worksheet is None:
+        worksheet = workbook.create_sheet(sheet)
+        if header:
+            worksheet.append(header)
+    workbook.save(path)
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'xlsx': write_xlsx}
+
+
+class ExportJob:
+    """
+    One export running (or finished) in the background. Read-only for
+    callers; the worker updates written, status and error.
+    """
+
+    def __init__(self, name, fmt, total, path):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.format = fmt
+        self.total = total
+        self.path = path
+        self.file_name = f"{name}.{fmt}"
+        self.mime = MIME_TYPES[fmt]
+        self.written = 0
+        self.status = 'queued'
+        self.error = None
+        self.created = time.time()
+        self.seconds = None
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    @property
+    def progress(self):
+        """
+        Fraction of rows written, between 0 and 1.
+        """
+        if self.status == 'done':
+            return 1.0
+        return min(self.written / self.total, 1.0) if self.total else 0.0
+
+    def read(self):
+        """
+        Returns the exported file's bytes.
+        """
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class Exporter:
+    """
+    Runs exports on a small pool of background threads shared by all
+    sessions, so a long export never holds up a script run. Files go to
+    directory; only the newest `keep` are kept.
+    """
+
+    def __init__(self, directory=None, workers=2, keep=50):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'vahan_exports')
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def submit(self, name, fmt, chunks, total):
+        """
+        Queues writing the DataFrame chunks (total rows) as fmt and returns
+        the ExportJob. chunks is consumed on a worker thread.
+        """
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+        path = os.path.join(self.directory, f"{uuid.uuid4().hex}.{fmt}")
+        job = ExportJob(name, fmt, total, path)
+        with self._lock:
+            self._jobs[job.id] = job
+            stale = sorted(self._jobs.values(), key=lambda j: j.created)[:-self.keep]
+            for old in stale:
+                if old.finished:
+                    del self._jobs[old.id]
+                    if os.path.exists(old.path):
+                        os.remove(old.path)
+        self._pool.submit(self._run, job, chunks)
+        return job
+
+    def job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job, chunks):
+        start = time.perf_counter()
+        job.status = 'running'
+
+        def progress(rows):
+            job.written += rows
+
+        try:
+            WRITERS[job.format](chunks, job.path, progress)
+            if not os.path.exists(job.path):
+                raise FileNotFoundError(f"the {job.format} writer received no rows and wrote no file")
+            status = 'done'
+        except Exception as exc:
+            job.error = f"{type(exc).__name__}: {exc}"
+            status = 'failed'
+            if os.path.exists(job.path):
+                os.remove(job.path)
+        finally:
+            # Lets a DuckDB row stream close its cursor if the writer stopped early.
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        job.seconds = time.perf_counter() - start
+        # Set last: callers read seconds and the file once a job is finished.
+        job.status = status
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """
+    Precomputed per-value row positions for the filterable columns of a frame.
+
+    A selection is answered by concatenating the position lists of the chosen
+    values and intersecting across columns, so cost follows the number of
+    matching rows instead of a full scan per filter. Columns whose selection
+    covers every value add no work at all.
+    """
+
+    def __init__(self, frame, columns):
+        self.size = len(frame)
+        self.dtype = np.int32 if self.size < 2**31 else np.int64
+        self._positions = {}
+        self._has_nulls = {}
+        for col in columns:
+            if col in frame.columns:
+                self._positions[col] = self._build(frame[col])
+                self._has_nulls[col] = bool(frame[col].isna().any())
+
+    def _build(self, values):
+        codes, uniques = pd.factorize(values, sort=True)
+        valid = codes >= 0
+        # Stable sort keeps positions ascending within each value; missing
+        # values (code -1) sort first and are dropped, matching isin().
+        order = np.argsort(codes, kind='stable')[int((~valid).sum()):].astype(self.dtype)
+        counts = np.bincount(codes[valid], minlength=len(uniques))
+        return dict(zip(uniques, np.split(order, np.cumsum(counts)[:-1])))
+
+    @property
+    def columns(self):
+        return list(self._positions)
+
+    def values(self, column):
+        """
+        Returns the sorted distinct non-null values indexed for column.
+        """
+        return list(self._positions[column])
+
+    def positions(self, column, values):
+        """
+        Returns the sorted row positions where column is one of values.
+        """
+        index = self._positions[column]
+        parts = [index[v] for v in values if v in index]
+        if not parts:
+            return np.empty(0, dtype=self.dtype)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def select(self, selections):
+        """
+        Returns sorted row positions matching every {column: values} selection.
+        A value of None, or a selection covering every indexed value, leaves
+        that column unconstrained.
+        """
+        constrained = []
+        for col, values in selections.items():
+            if values is None or col not in self._positions:
+                continue
+            values = set(values)
+            if not self._has_nulls[col] and values.issuperset(self._positions[col]):
+                continue
+            constrained.append(self.positions(col, values))
+        if not constrained:
+            return np.arange(self.size, dtype=self.dtype)
+        constrained.sort(key=len)
+        result = constrained[0]
+        for other in constrained[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, other, assume_unique=True)
+        return result
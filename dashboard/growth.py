@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# Periods are integer codes counted from year 0: month = year * 12 + month - 1,
+# so every coarser period is an integer division of the month code.
+MONTHS_PER_PERIOD = {'month': 1, 'quarter': 3, 'year': 12}
+PERIOD_COLUMNS = {'month': 'Month', 'quarter': 'Quarter', 'year': 'Year'}
+GROWTH_PREFIXES = {'month': 'MoM', 'quarter': 'QoQ', 'year': 'YoY'}
+
+
+def month_codes(dates):
+    """
+    Converts a datetime Series to nullable integer month codes.
+    """
+    return (dates.dt.year * 12 + dates.dt.month - 1).astype('Int32')
+
+
+def period_labels(codes, period):
+    """
+    Formats integer period codes as Year (int), 'YYYYQn' or 'YYYY-MM' labels.
+    """
+    codes = pd.Series(codes)
+    if period == 'year':
+        return codes
+    if period == 'quarter':
+        return (codes // 4).astype(str) + 'Q' + (codes % 4 + 1).astype(str)
+    return (codes // 12).astype(str) + '-' + (codes % 12 + 1).astype(str).str.zfill(2)
+
+
+def growth_column(period):
+    return f"{GROWTH_PREFIXES[period]}_Growth_%"
+
+
+def period_growth(cells, period, keys, value='Registrations'):
+    """
+    Sums cells per period x keys and adds Prev_<value> and <XoX>_Growth_%.
+
+    cells needs a MonthCode column. Aggregation, ordering and the previous
+    period lookup happen in one sorted vectorized pass. The previous value is
+    only taken from the immediately preceding period of the same group; after
+    a gap in the data growth is NaN rather than measured against an older
+    period.
+    """
+    cells = cells[cells['MonthCode'].notna()]
+    codes = cells['MonthCode'].to_numpy(dtype=np.int64) // MONTHS_PER_PERIOD[period]
+    period_key = pd.Series(codes, index=cells.index, name='_period')
+    table = (
+        cells.groupby([cells[k] for k in keys] + [period_key], observed=True)[value]
+        .sum()
+        .reset_index()
+    )
+
+    codes = table['_period'].to_numpy()
+    values = table[value].to_numpy(dtype=float)
+    if keys:
+        groups = table.groupby(keys, observed=True, sort=False).ngroup().to_numpy()
+    else:
+        groups = np.zeros(len(table), dtype=np.int64)
+    previous = np.full(len(table), np.nan)
+    consecutive = (groups[1:] == groups[:-1]) & (codes[1:] == codes[:-1] + 1)
+    previous[1:][consecutive] = values[:-1][consecutive]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = ((values - previous) / previous * 100).round(2)
+
+    table.insert(0, PERIOD_COLUMNS[period], period_labels(codes, period).to_numpy())
+    table[f"Prev_{value}"] = previous
+    table[growth_column(period)] = change
+    return table.drop(columns='_period')
+
+
+def regroup(table, period, keys, value='Registrations'):
+    """
+    Re-aggregates period_growth output to coarser keys, e.g. after small
+    manufacturers were relabelled "Other".
+
+    Growth is recomputed from sums, counting only members that have a
+    previous period, so a member that first appears in a period does not
+    count as growth. Returns the same columns as period_growth.
+    """
+    label = PERIOD_COLUMNS[period]
+    prev = f"Prev_{value}"
+    based = table[value].where(table[prev].notna())
+    grouped = table.assign(_based=based).groupby(keys + [label], observed=True)
+    out = pd.DataFrame({
+        value: grouped[value].sum(),
+        prev: grouped[prev].sum(min_count=1),
+        '_based': grouped['_based'].sum(min_count=1),
+    }).reset_index()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[growth_column(period)] = ((out['_based'] - out[prev]) / out[prev] * 100).round(2)
+    return out[[label] + keys + [value, prev, growth_column(period)]]
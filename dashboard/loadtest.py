@@ -0,0 +1,56 @@
+import argparse
+import gc
+import os
+
+from streamlit.testing.v1 import AppTest
+
+import profiler
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def rss_mb():
+    """
+    Returns the current resident set size of this process in MB.
+    """
+    return profiler.rss_bytes() / 2**20
+
+
+def run_sessions(count, sessions):
+    """
+    Opens `count` more simulated sessions and keeps them alive in `sessions`.
+    """
+    for _ in range(count):
+        at = AppTest.from_file(APP_PATH, default_timeout=300).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        sessions.append(at)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Checks that dashboard memory stays flat as the number of sessions grows."
+    )
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 25, 50])
+    args = parser.parse_args()
+
+    # Sessions resolve the dataset relative to the dashboard folder, like `streamlit run`.
+    os.chdir(os.path.dirname(APP_PATH))
+    baseline = rss_mb()
+    sessions = []
+    previous_count, previous_rss = 0, None
+    print(f"{'sessions':>8} {'rss_mb':>10} {'delta_mb':>10} {'mb/session':>11}")
+    for target in sorted(args.sessions):
+        run_sessions(target - len(sessions), sessions)
+        gc.collect()
+        rss = rss_mb()
+        if previous_rss is None:
+            per_session = rss - baseline
+        else:
+            per_session = (rss - previous_rss) / max(target - previous_count, 1)
+        print(f"{target:>8} {rss:>10.1f} {rss - baseline:>10.1f} {per_session:>11.2f}")
+        previous_count, previous_rss = target, rss
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import math
+import random
+
+import pandas as pd
+
+import dataset
+import drilldown
+import precompute
+import views
+
+
+def _plain(value):
+    # Backends differ in dtypes (categorical vs string keys, int16 vs int64
+    # years); parity is about values, so compare everything as plain objects.
+    if isinstance(value, pd.Series):
+        value = value.reset_index()
+    frame = value.reset_index(drop=True)
+    return frame.astype({c: object for c in frame.columns if not pd.api.types.is_float_dtype(frame[c])})
+
+
+def same(left, right):
+    """
+    Returns whether two view values (KPI dicts, frames, series or None) match.
+    Floats compare to 1e-9 relative tolerance.
+    """
+    if left is None or right is None:
+        return left is None and right is None
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(
+            (math.isnan(left[k]) and math.isnan(right[k])) or math.isclose(left[k], right[k], rel_tol=1e-9)
+            for k in left
+        )
+    try:
+        pd.testing.assert_frame_equal(_plain(left), _plain(right), check_dtype=False, rtol=1e-9)
+    except AssertionError:
+        return False
+    return True
+
+
+def random_selections(shared, count, seed=0):
+    """
+    Returns count random sidebar selections, some with state and RTO filters.
+    """
+    rng = random.Random(seed)
+    chosen = []
+    for i in range(count):
+        selection = views.default_selection(shared)
+        selection['years'] = rng.sample(shared.years, rng.randint(1, len(shared.years)))
+        selection['categories'] = rng.sample(shared.categories, rng.randint(1, len(shared.categories)))
+        if shared.manufacturers:
+            selection['manufacturers'] = rng.sample(shared.manufacturers, rng.randint(1, len(shared.manufacturers)))
+        if i % 2 and shared.states:
+            selection['states'] = rng.sample(shared.states, rng.randint(1, min(5, len(shared.states))))
+            rtos = shared.rtos_in(selection['states'])
+            if i % 4 == 1 and rtos:
+                selection['rtos'] = rng.sample(rtos, min(3, len(rtos)))
+        chosen.append(selection)
+    return chosen
+
+
+def compare(left, right, selections, drill=3):
+    """
+    Computes every dashboard view with both backends for each selection,
+    plus the RTO level of its `drill` largest states. Returns
+    [(selection index, view name)] for each view that differs.
+    """
+    by_manufacturer = bool(left.manufacturers)
+    mismatches = []
+    for i, selection in enumerate(selections):
+        left_slice, right_slice = left.select(**selection), right.select(**selection)
+        expected = views.compute_views(left_slice, by_manufacturer)
+        actual = views.compute_views(right_slice, by_manufacturer)
+        mismatches.extend((i, name) for name in expected if not same(expected[name], actual[name]))
+        for code in expected['state_level'][drilldown.STATE_CODE][:drill]:
+            if not same(views.rto_level(left_slice, code), views.rto_level(right_slice, code)):
+                mismatches.append((i, views.rto_part(code)))
+    return mismatches
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Checks that the pandas and DuckDB backends return identical KPIs, tables and growth."
+    )
+    parser.add_argument('csv', nargs='?', help="full VAHAN export (default: auto-detect)")
+    parser.add_argument('--random', type=int, default=50, help="random selections to check besides the standard ones")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    pandas_data = dataset.load_shared(csv_path=args.csv, backend='pandas')
+    if pandas_data is None:
+        sys.exit("No VAHAN CSV found.")
+    duck_data = dataset.load_shared(csv_path=pandas_data.csv_path, backend='duckdb')
+    for attr in ('years', 'categories', 'manufacturers', 'states', 'records', 'state_count'):
+        if getattr(pandas_data, attr) != getattr(duck_data, attr):
+            print(f"dataset {attr} differs")
+
+    selections = precompute.standard_selections(pandas_data) + random_selections(pandas_data, args.random, args.seed)
+    mismatches = compare(pandas_data, duck_data, selections)
+    for i, name in mismatches:
+        print(f"selection {i}: {name} differs")
+    print(f"Checked {len(selections)} selections x {len(views.SECTIONS)} sections: "
+          f"{len(mismatches)} mismatch(es).")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,124 @@
+import os
+import pickle
+import time
+
+import dataset
+import store
+import views
+
+ARTIFACT_NAME = 'views.pkl'
+# Bump when compute_views output changes shape, so old artifacts are ignored.
+ARTIFACT_VERSION = 3
+
+
+def artifact_path(csv_path):
+    """
+    Returns where the precomputed views for csv_path are kept, next to its partitions.
+    """
+    return os.path.join(store.cache_dir(csv_path), ARTIFACT_NAME)
+
+
+def standard_selections(shared):
+    """
+    Returns the selections worth precomputing: the sidebar defaults, each
+    year on its own, and every manufacturer at once.
+    """
+    default = views.default_selection(shared)
+    chosen = [default]
+    for year in shared.years:
+        chosen.append(dict(default, years=[year]))
+    if shared.manufacturers:
+        chosen.append(dict(default, manufacturers=shared.manufacturers))
+    return chosen
+
+
+def compute_all(shared, selections=None):
+    """
+    Returns [(selection, computed views)] for each selection, computed
+    exactly as the dashboard would.
+    """
+    by_manufacturer = bool(shared.manufacturers)
+    return [
+        (selection, views.compute_views(shared.select(**selection), by_manufacturer))
+        for selection in (selections or standard_selections(shared))
+    ]
+
+
+def write_artifact(shared, path=None, selections=None):
+    """
+    Precomputes the views for shared and saves each with the version of its
+    selected years. Returns the artifact path.
+    """
+    path = path or artifact_path(shared.csv_path)
+    payload = {
+        'format': ARTIFACT_VERSION,
+        'version': shared.version,
+        'created': time.time(),
+        'views': [
+            (selection, shared.version_for(selection['years']), computed)
+            for selection, computed in compute_all(shared, selections)
+        ],
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return path
+
+
+def load_artifact(shared, path=None):
+    """
+    Returns the saved [(selection, computed views)] still valid for shared:
+    those whose selected years have not changed since the artifact was built.
+    Returns [] when the artifact is missing or unreadable.
+    """
+    if path is None:
+        if shared.csv_path is None:
+            return []
+        path = artifact_path(shared.csv_path)
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return []
+    if payload.get('format') != ARTIFACT_VERSION:
+        return []
+    return [
+        (selection, computed) for selection, version, computed in payload['views']
+        if version == shared.version_for(selection['years'])
+    ]
+
+
+def warm(cache, shared, path=None):
+    """
+    Puts the saved views for shared into a ResultCache, one entry per
+    dashboard section. Returns how many selections were loaded.
+    """
+    loaded = load_artifact(shared, path)
+    for selection, computed in loaded:
+        for section, names in views.SECTIONS.items():
+            key = views.cache_key(shared, selection, section)
+            cache.put(key, {n: computed[n] for n in names})
+    return len(loaded)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Precomputes the dashboard's standard views for the current dataset snapshot."
+    )
+    parser.add_argument('csv', nargs='?', help="full VAHAN export (default: auto-detect)")
+    parser.add_argument('--output', help=f"artifact path (default: <cache dir>/{ARTIFACT_NAME})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    shared = dataset.load_shared(csv_path=args.csv)
+    if shared is None:
+        print("No VAHAN CSV found.")
+    else:
+        path = write_artifact(shared, args.output)
+        count = len(standard_selections(shared))
+        print(f"Wrote {count} view set(s) for dataset {shared.version} to {path} "
+              f"({os.path.getsize(path) / 2**10:,.0f} KB, {time.perf_counter() - start:.1f} s)")
@@ -0,0 +1,238 @@
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# Upper bounds in seconds, from a cache hit (~1 ms) to a cold load.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def rss_bytes():
+    """
+    Returns the current resident set size of this process in bytes.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # macOS reports peak RSS in bytes, Linux in KB; peak is close enough here.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def rows_of(value):
+    """
+    Returns the row count of a frame, series, cube slice or list, else None.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if hasattr(value, 'cells'):
+        return len(value.cells)
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    return None
+
+
+class Stage:
+    """
+    Timing of one named stage: wall time, rows in/out and RSS change, plus
+    the JSON size sent to the browser for chart stages.
+    """
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = None
+        self.memory_delta = None
+        self.payload_bytes = None
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'ms': None if self.seconds is None else self.seconds * 1000,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'memory_delta_mb': None if self.memory_delta is None else self.memory_delta / 2**20,
+            'payload_kb': None if self.payload_bytes is None else self.payload_bytes / 2**10,
+        }
+
+
+class Run:
+    """
+    Stages timed during one script rerun. Each rerun gets its own Run, so
+    concurrent sessions never share one; finished stages feed the profiler's
+    process-wide histograms.
+    """
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self.stages = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Times the body of a with block. Set .rows_out on the yielded Stage.
+        """
+        record = Stage(name, rows_in)
+        rss = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            record.memory_delta = rss_bytes() - rss
+            self.stages.append(record)
+            if self.profiler is not None:
+                self.profiler.observe(record)
+
+    def call(self, name, func, rows_in=None):
+        """
+        Times func() as a stage and returns its value.
+        """
+        with self.stage(name, rows_in) as record:
+            value = func()
+            record.rows_out = rows_of(value)
+        return value
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def table(self):
+        """
+        Returns the stages of this run as a DataFrame, in execution order.
+        """
+        return pd.DataFrame(
+            [s.as_dict() for s in self.stages],
+            columns=['stage', 'ms', 'rows_in', 'rows_out', 'memory_delta_mb', 'payload_kb'],
+        )
+
+
+class Profiler:
+    """
+    Process-wide per-stage latency histograms, exported in the
+    Prometheus/OpenMetrics text format. Thread-safe.
+    """
+
+    def __init__(self, buckets=BUCKETS, prefix='vahan_dashboard', metrics_file=None):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.metrics_file = metrics_file
+        self._histograms = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def run(self):
+        return Run(self)
+
+    def observe(self, record):
+        with self._lock:
+            hist = self._histograms.get(record.name)
+            if hist is None:
+                hist = self._histograms[record.name] = {
+                    'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if record.seconds <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += record.seconds
+            hist['count'] += 1
+            self._last[record.name] = record
+
+    def openmetrics(self):
+        """
+        Returns every histogram, plus the last rows out and memory change
+        per stage, as OpenMetrics text.
+        """
+        seconds = f'{self.prefix}_stage_seconds'
+        rows = f'{self.prefix}_stage_rows_out'
+        memory = f'{self.prefix}_stage_memory_delta_bytes'
+        payload = f'{self.prefix}_stage_payload_bytes'
+        with self._lock:
+            lines = [
+                f'# TYPE {seconds} histogram',
+                f'# HELP {seconds} Wall time of each dashboard stage.',
+            ]
+            for name in sorted(self._histograms):
+                hist = self._histograms[name]
+                label = _escape(name)
+                for bound, count in zip(self.buckets, hist['buckets']):
+                    lines.append(f'{seconds}_bucket{{stage="{label}",le="{bound}"}} {count}')
+                lines.append(f'{seconds}_bucket{{stage="{label}",le="+Inf"}} {hist["count"]}')
+                lines.append(f'{seconds}_sum{{stage="{label}"}} {hist["sum"]:.6f}')
+                lines.append(f'{seconds}_count{{stage="{label}"}} {hist["count"]}')
+            for metric, attr, help_text in (
+                (rows, 'rows_out', 'Rows returned by the last run of each stage.'),
+                (memory, 'memory_delta', 'Change in process RSS during the last run of each stage.'),
+                (payload, 'payload_bytes', 'Chart JSON sent to the browser by the last run of each stage.'),
+            ):
+                lines.append(f'# TYPE {metric} gauge')
+                lines.append(f'# HELP {metric} {help_text}')
+                for name in sorted(self._last):
+                    value = getattr(self._last[name], attr)
+                    if value is not None:
+                        lines.append(f'{metric}{{stage="{_escape(name)}"}} {value}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Writes the metrics to path atomically, e.g. for node_exporter's
+        textfile collector.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.openmetrics())
+        os.replace(tmp, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        Serves the metrics at http://host:port/metrics from a daemon thread.
+        """
+        if self._server is not None:
+            return self._server
+        profiler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = profiler.openmetrics().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def from_environment():
+    """
+    Returns a Profiler, serving or writing metrics as configured by
+    VAHAN_METRICS_PORT and VAHAN_METRICS_FILE.
+    """
+    profiler = Profiler(metrics_file=os.environ.get('VAHAN_METRICS_FILE'))
+    port = os.environ.get('VAHAN_METRICS_PORT')
+    if port:
+        profiler.serve(int(port), os.environ.get('VAHAN_METRICS_HOST', '127.0.0.1'))
+    return profiler
@@ -0,0 +1,112 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def make_key(version, selections, part=None):
+    """
+    Builds an order-insensitive cache key from {column: values} filters.
+    None (no filter) stays distinct from an empty selection. part names a
+    piece of the result cached on its own, e.g. one dashboard section.
+    """
+    normalized = []
+    for col in sorted(selections):
+        values = selections[col]
+        if values is not None:
+            values = tuple(sorted({str(v) for v in values}))
+        normalized.append((col, values))
+    if part is None:
+        return (version, tuple(normalized))
+    return (version, tuple(normalized), part)
+
+
+def sizeof(value):
+    """
+    Approximates the memory held by a cached result in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Process-wide LRU of computed views, bounded by approximate memory.
+    Thread-safe, so every Streamlit session can share one instance.
+    """
+
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                # Larger than the whole budget; never cache it.
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for key, computing and storing it on a miss.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Returns hit/miss/eviction counters and current usage.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -2,23 +2,305 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import os
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+
+# NOTE: The Vahan Dashboard (reportview.xhtml) is a JSF page that uses dynamic JS and
+# POST requests with a ViewState, so it cannot be fetched with these GET parameters.
+# fetch_all expects an endpoint that returns one report table per GET with year,
+# vehicleType and state parameters, such as the stand-in in scraper_harness.py.
+# There is no default URL until a real endpoint is built.
+HTTP_CACHE_DIR = os.path.join('data', '.http_cache')
+CHECKPOINT_PATH = os.path.join('data', '.fetch_checkpoint.json')
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def data_file_path(year, vehicle_type, state=None, data_dir='data'):
+    """
+    Returns the CSV path for a year/vehicle type (and optional state), following
+    the vehicle_data_<YEAR>_<VEHICLE_TYPE>[__<State>].csv convention from DATA_COLLECTION.md.
+    """
+    name = f'vehicle_data_{year}_{vehicle_type.replace(" ", "_")}'
+    if state:
+        name += f'__{state.replace(" ", "_")}'
+    return os.path.join(data_dir, name + '.csv')
+
 
 def fetch_vahan_data(year=2025, vehicle_type='FOUR WHEELER'):
     """
     Scrapes vehicle class-wise data for a given year and vehicle type from Vahan Dashboard.
     Returns a DataFrame.
     """
-    # NOTE: The Vahan Dashboard uses dynamic JS and POST requests, so this is a placeholder for manual download or advanced scraping.
-    # For demo, load from screenshot or manually downloaded CSV.
-    # Replace this with actual scraping logic if possible.
-    file_path = os.path.join('data', f'vehicle_data_{year}_{vehicle_type.replace(" ", "_")}.csv')
+    # NOTE: The Vahan Dashboard uses dynamic JS and POST requests, so this reads a
+    # manually downloaded CSV (see DATA_COLLECTION.md) or one written by fetch_all.
+    file_path = data_file_path(year, vehicle_type)
     if os.path.exists(file_path):
-        return pd.read_csv(file_path)
+        return pd.read_csv(file_path, comment='#')
     else:
         print(f"Please download the data for {year} - {vehicle_type} and save as {file_path}")
         return pd.DataFrame()
 
+
+class RateLimiter:
+    """
+    Token bucket shared by all worker threads: at most `rate` requests per
+    second on average, with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class ResponseCache:
+    """
+    On-disk cache of response bodies with their ETag/Last-Modified validators,
+    so repeated runs revalidate with a conditional GET instead of refetching.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, params):
+        key = json.dumps([url, sorted((params or {}).items())])
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def get(self, url, params):
+        try:
+            with open(self._path(url, params)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, params, response):
+        entry = {
+            'url': response.url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body': response.text,
+        }
+        path = self._path(url, params)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+        return entry
+
+
+class Checkpoint:
+    """
+    Records finished (year, vehicle_type, state) jobs so an interrupted run
+    resumes where it stopped.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.done = set(json.load(f))
+        except (OSError, ValueError):
+            self.done = set()
+
+    @staticmethod
+    def key(year, vehicle_type, state):
+        return f'{year}|{vehicle_type}|{state or ""}'
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def mark(self, key):
+        with self.lock:
+            self.done.add(key)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(sorted(self.done), f)
+            os.replace(tmp, self.path)
+
+
+def make_session(pool_size=8):
+    """
+    Returns a requests.Session whose connection pool fits `pool_size` workers.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = 'fincially-dashboard-scraper'
+    return session
+
+
+def _retry_delay(response, attempt, backoff):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return backoff * 2 ** attempt * (1 + random.random() / 2)
+
+
+def fetch_page(session, url, params=None, cache=None, limiter=None, retries=4, backoff=0.5, timeout=30):
+    """
+    GETs a page with rate limiting, retries with exponential backoff and
+    conditional revalidation against the response cache. Returns the body.
+    """
+    cached = cache.get(url, params) if cache else None
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.wait()
+        response = None
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            if response.status_code == 304:
+                if not cached:
+                    raise requests.HTTPError(f"304 Not Modified for {response.url} without a cached copy",
+                                             response=response)
+                return cached['body']
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                if cache:
+                    cache.put(url, params, response)
+                return response.text
+            if attempt == retries:
+                response.raise_for_status()
+        time.sleep(_retry_delay(response, attempt, backoff))
+
+
+def parse_vehicle_table(html):
+    """
+    Parses the first HTML table of a report page into a DataFrame.
+    """
+    table = BeautifulSoup(html, 'html.parser').find('table')
+    if table is None:
+        return pd.DataFrame()
+    rows = []
+    for tr in table.find_all('tr'):
+        cells = [c.get_text(strip=True) for c in tr.find_all(['th', 'td'])]
+        if cells:
+            rows.append(cells)
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows[1:], columns=rows[0])
+    for col in df.columns[1:]:
+        df[col] = pd.to_numeric(df[col].str.replace(',', ''), errors='coerce')
+    return df
+
+
+def _fetch_job(session, base_url, year, vehicle_type, state, cache, limiter, data_dir):
+    params = {'year': year, 'vehicleType': vehicle_type}
+    if state:
+        params['state'] = state
+    df = parse_vehicle_table(fetch_page(session, base_url, params, cache=cache, limiter=limiter))
+    path = data_file_path(year, vehicle_type, state, data_dir)
+    buf = io.StringIO()
+    where = f', {state}' if state else ''
+    buf.write(f'# Vehicle registration data for {vehicle_type}, {year}{where}\n')
+    df.to_csv(buf, index=False)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(buf.getvalue())
+    os.replace(tmp, path)
+    return path
+
+
+def fetch_all(years, vehicle_types, base_url, states=(None,), workers=8,
+              rate=4.0, data_dir='data', cache_dir=HTTP_CACHE_DIR, checkpoint_path=CHECKPOINT_PATH,
+              session=None):
+    """
+    Fetches every year x vehicle type x state combination from base_url
+    concurrently and saves each as a CSV in data_dir. Jobs already in the checkpoint (with
+    their CSV present) are skipped, so a rerun resumes an interrupted fetch.
+    Returns {(year, vehicle_type, state): path or exception}.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    session = session or make_session(workers)
+    cache = ResponseCache(cache_dir)
+    limiter = RateLimiter(rate, burst=workers)
+    checkpoint = Checkpoint(checkpoint_path)
+
+    results = {}
+    jobs = []
+    for year in years:
+        for vehicle_type in vehicle_types:
+            for state in states:
+                key = Checkpoint.key(year, vehicle_type, state)
+                path = data_file_path(year, vehicle_type, state, data_dir)
+                if key in checkpoint and os.path.exists(path):
+                    results[(year, vehicle_type, state)] = path
+                else:
+                    jobs.append((year, vehicle_type, state))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_fetch_job, session, base_url, year, vehicle_type, state, cache, limiter, data_dir): (year, vehicle_type, state)
+            for year, vehicle_type, state in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results[job] = future.result()
+                checkpoint.mark(Checkpoint.key(*job))
+            except Exception as exc:  # keep going; failures are retried on the next run
+                results[job] = exc
+    return results
+
+
 if __name__ == "__main__":
-    # Example usage
-    df = fetch_vahan_data()
-    print(df.head())
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetches VAHAN vehicle class tables.")
+    parser.add_argument('--years', type=int, nargs='+', default=[2025])
+    parser.add_argument('--vehicle-types', nargs='+', default=['FOUR WHEELER'])
+    parser.add_argument('--states', nargs='+', default=[None], help="state names (default: all-India)")
+    parser.add_argument('--base-url', required=True,
+                        help="report endpoint, e.g. the stand-in from scraper_harness.py --serve")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=4.0, help="max requests per second")
+    args = parser.parse_args()
+
+    results = fetch_all(args.years, args.vehicle_types, args.base_url, args.states,
+                        workers=args.workers, rate=args.rate)
+    failed = {job: err for job, err in results.items() if isinstance(err, Exception)}
+    print(f"Fetched {len(results) - len(failed)} of {len(results)} tables")
+    for job, err in sorted(failed.items(), key=str):
+        print(f"  failed {job}: {err}")
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import scraper
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'vahan')
+FOUR_WHEELER = 'FOUR WHEELER'
+
+
+def fixture_path(year, vehicle_type, fixture_dir=FIXTURE_DIR):
+    """
+    Returns the fixture page served for a year and vehicle type.
+    """
+    return os.path.join(fixture_dir, f'report_{year}_{vehicle_type.replace(" ", "_")}.html')
+
+
+class StandInServer:
+    """
+    Local stand-in for the report endpoint scraper.fetch_all expects.
+    GET /report?year=&vehicleType=[&state=] returns the matching fixture page
+    with an ETag and answers a matching If-None-Match with 304. A missing
+    fixture is a 404. For testing, `failures[job]` makes the next requests
+    for job fail with 503, and jobs in `not_modified` always get a 304.
+    Every request is logged in `requests` as (year, vehicle_type, state, status).
+    """
+
+    def __init__(self, fixture_dir=FIXTURE_DIR, port=0):
+        self.fixture_dir = fixture_dir
+        self.failures = {}
+        self.not_modified = set()
+        self.requests = []
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/report'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def statuses(self, year, vehicle_type, state=None):
+        """
+        Returns the statuses sent for one job, in order.
+        """
+        return [r[3] for r in self.requests if r[:3] == (year, vehicle_type, state)]
+
+    def _handle(self, request):
+        query = parse_qs(urlparse(request.path).query)
+        job = (int(query['year'][0]), query['vehicleType'][0], query.get('state', [None])[0])
+        status, body, headers = self._respond(job, request.headers.get('If-None-Match'))
+        with self.lock:
+            self.requests.append(job + (status,))
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _respond(self, job, etag):
+        with self.lock:
+            if self.failures.get(job):
+                self.failures[job] -= 1
+                return 503, b'', {'Retry-After': '0'}
+        if job in self.not_modified:
+            return 304, b'', {}
+        try:
+            with open(fixture_path(job[0], job[1], self.fixture_dir), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return 404, b'', {}
+        tag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if etag == tag:
+            return 304, b'', {'ETag': tag}
+        return 200, body, {'ETag': tag, 'Content-Type': 'text/html; charset=utf-8'}
+
+
+def _fetch(server, work_dir, years, vehicle_types=(FOUR_WHEELER,), states=(None,)):
+    return scraper.fetch_all(
+        years, vehicle_types, server.url, states, workers=4, rate=0,
+        data_dir=os.path.join(work_dir, 'data'),
+        cache_dir=os.path.join(work_dir, 'http_cache'),
+        checkpoint_path=os.path.join(work_dir, 'checkpoint.json'),
+    )
+
+
+def check_retries(server, work_dir):
+    """
+    Two 503s in a row are retried and the job still succeeds.
+    """
+    server.failures[(2025, FOUR_WHEELER, None)] = 2
+    results = _fetch(server, work_dir, [2024, 2025])
+    assert all(isinstance(r, str) for r in results.values()), results
+    assert server.statuses(2025, FOUR_WHEELER) == [503, 503, 200], server.statuses(2025, FOUR_WHEELER)
+    saved = open(results[(2025, FOUR_WHEELER, None)]).read()
+    assert 'MOTOR CAR,0,2325098,0,0,2325098' in saved, saved
+
+
+def check_revalidation(server, work_dir):
+    """
+    Refetching without the checkpoint revalidates each page: the server
+    answers 304 and the cached bodies are saved again.
+    """
+    results = _fetch(server, work_dir, [2024, 2025])
+    before = {job: open(path).read() for job, path in results.items()}
+    os.remove(os.path.join(work_dir, 'checkpoint.json'))
+    del server.requests[:]
+    results = _fetch(server, work_dir, [2024, 2025])
+    assert [r[3] for r in server.requests] == [304, 304], server.requests
+    assert {job: open(path).read() for job, path in results.items()} == before
+
+
+def check_resume(server, work_dir):
+    """
+    A rerun fetches only the jobs that did not finish before.
+    """
+    results = _fetch(server, work_dir, [2024, 2025, 2026])
+    assert isinstance(results[(2026, FOUR_WHEELER, None)], requests.HTTPError), results
+    shutil.copy(fixture_path(2025, FOUR_WHEELER), fixture_path(2026, FOUR_WHEELER, server.fixture_dir))
+    del server.requests[:]
+    results = _fetch(server, work_dir, [2024, 2025, 2026])
+    assert all(isinstance(r, str) for r in results.values()), results
+    assert [r[:3] for r in server.requests] == [(2026, FOUR_WHEELER, None)], server.requests
+
+
+def check_304_without_cache(server, work_dir):
+    """
+    A 304 for a page that was never cached is an error, not an empty body.
+    """
+    server.not_modified.add((2024, FOUR_WHEELER, None))
+    try:
+        scraper.fetch_page(requests.Session(), server.url, {'year': 2024, 'vehicleType': FOUR_WHEELER})
+    except requests.HTTPError:
+        return
+    raise AssertionError("fetch_page accepted a 304 without a cached copy")
+
+
+CHECKS = [check_retries, check_revalidation, check_resume, check_304_without_cache]
+
+
+def run_checks():
+    """
+    Runs each check against a fresh stand-in server and work directory.
+    Returns [(check name, error or None)].
+    """
+    outcomes = []
+    for check in CHECKS:
+        with tempfile.TemporaryDirectory() as work_dir:
+            fixture_dir = os.path.join(work_dir, 'fixtures')
+            shutil.copytree(FIXTURE_DIR, fixture_dir)
+            server = StandInServer(fixture_dir).start()
+            try:
+                check(server, work_dir)
+                outcomes.append((check.__name__, None))
+            except AssertionError as exc:
+                outcomes.append((check.__name__, exc))
+            finally:
+                server.stop()
+    return outcomes
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Checks scraper.py's retries, revalidation and resume against a local "
+                    "stand-in server, or serves the fixture pages with --serve."
+    )
+    parser.add_argument('--serve', action='store_true', help="only serve the fixtures until interrupted")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.serve:
+        server = StandInServer(port=args.port)
+        print(f"Serving {FIXTURE_DIR} at {server.url}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.httpd.server_close()
+        sys.exit(0)
+
+    outcomes = run_checks()
+    for name, error in outcomes:
+        print(f"{'ok  ' if error is None else 'FAIL'} {name}{'' if error is None else f': {error}'}")
+    sys.exit(1 if any(error is not None for _, error in outcomes) else 0)
@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+
+# HyperLogLog registers per group are 2**precision bytes; 8 gives ~6.5% error.
+HLL_PRECISION = 8
+_HASH_BITS = 52
+
+
+def codes_of(values):
+    """
+    Returns (codes, uniques) for values with nulls dropped to code -1.
+    """
+    return pd.factorize(values, sort=True)
+
+
+def _popcount(words):
+    # Set bits in an array of unsigned words. np.bitwise_count needs numpy 2.
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(np.ascontiguousarray(words).view(np.uint8)).sum())
+
+
+def _expand(starts, lengths):
+    # Expands each [start, start + length) range into its positions.
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+
+
+class BitsetSketch:
+    """
+    Exact distinct counts of members over any union of groups.
+
+    Each group keeps a bitset of the members it contains. Members are split
+    into blocks (e.g. RTOs by state) and a group only stores words for the
+    blocks it touches, so a group in one state costs a word or two instead of
+    a bit per RTO in the country. Counting a selection ORs the bitsets of its
+    groups block by block and adds up the popcounts.
+    """
+
+    def __init__(self, groups, members, n_groups, blocks=None, n_members=None):
+        """
+        groups and members are parallel arrays of (group id, member code)
+        pairs; codes below 0 are nulls and ignored. blocks maps each member
+        code to its block, by default a single one. n_members is the size of
+        the member code space, by default len(blocks) or the largest code + 1;
+        sketches built with the same blocks and n_members can be concatenated.
+        """
+        groups = np.asarray(groups, dtype=np.int64)
+        members = np.asarray(members, dtype=np.int64)
+        keep = members >= 0
+        groups, members = groups[keep], members[keep]
+        if n_members is None:
+            n_members = len(blocks) if blocks is not None else int(members.max()) + 1 if len(members) else 0
+        block_of = np.zeros(n_members, dtype=np.int64) if blocks is None else np.asarray(blocks, dtype=np.int64)
+        n_blocks = int(block_of.max()) + 1 if n_members else 0
+
+        # Number members 0, 1, 2... within their block.
+        order = np.argsort(block_of, kind='stable')
+        sizes = np.bincount(block_of, minlength=n_blocks)
+        local = np.empty(n_members, dtype=np.int64)
+        local[order] = np.arange(n_members) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+        # One row per (group, block) present, ordered by group.
+        pair_block = block_of[members]
+        rows, pair_row = np.unique(groups * max(n_blocks, 1) + pair_block, return_inverse=True)
+        self._row_block = rows % max(n_blocks, 1)
+        self._group_start = np.searchsorted(rows // max(n_blocks, 1), np.arange(n_groups + 1))
+        self._row_slot = np.empty(len(rows), dtype=np.int64)
+        self._bits = []
+        for block in range(n_blocks):
+            in_block = np.flatnonzero(self._row_block == block)
+            self._row_slot[in_block] = np.arange(len(in_block))
+            bits = np.zeros((len(in_block), (int(sizes[block]) + 63) // 64), dtype=np.uint64)
+            mask = pair_block == block
+            slot = self._row_slot[pair_row[mask]]
+            bit = local[members[mask]]
+            np.bitwise_or.at(bits, (slot, bit // 64), np.left_shift(np.uint64(1), (bit % 64).astype(np.uint64)))
+            self._bits.append(bits)
+        self.n_groups = n_groups
+        self.total = self.count(np.arange(n_groups))
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self._bits)
+
+    def count(self, selected):
+        """
+        Returns the number of distinct members across the selected group ids.
+        """
+        selected = np.asarray(selected, dtype=np.int64)
+        starts = self._group_start[selected]
+        lengths = self._group_start[selected + 1] - starts
+        if not lengths.sum():
+            return 0
+        rows = _expand(starts, lengths)
+        row_blocks = self._row_block[rows]
+        order = np.argsort(row_blocks, kind='stable')
+        rows, row_blocks = rows[order], row_blocks[order]
+        bounds = np.flatnonzero(np.diff(row_blocks)) + 1
+        total = 0
+        for part in np.split(rows, bounds):
+            block = self._row_block[part[0]]
+            merged = np.bitwise_or.reduce(self._bits[block][self._row_slot[part]], axis=0)
+            total += _popcount(merged)
+        return total
+
+    def take(self, selected):
+        """
+        Returns a sketch of just the selected group ids, numbered 0, 1, 2...
+        in the order given.
+        """
+        selected = np.asarray(selected, dtype=np.int64)
+        starts = self._group_start[selected]
+        lengths = self._group_start[selected + 1] - starts
+        rows = _expand(starts, lengths)
+        taken = BitsetSketch.__new__(BitsetSketch)
+        taken._row_block = self._row_block[rows]
+        taken._group_start = np.r_[0, np.cumsum(lengths)].astype(np.int64)
+        taken._row_slot = np.empty(len(rows), dtype=np.int64)
+        taken._bits = []
+        for block, bits in enumerate(self._bits):
+            in_block = np.flatnonzero(taken._row_block == block)
+            taken._row_slot[in_block] = np.arange(len(in_block))
+            taken._bits.append(bits[self._row_slot[rows[in_block]]])
+        taken.n_groups = len(selected)
+        taken.total = taken.count(np.arange(taken.n_groups))
+        return taken
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Returns one sketch holding the groups of each part in turn. The parts
+        must share their member layout (blocks and n_members).
+        """
+        joined = cls.__new__(cls)
+        joined._row_block = np.concatenate([p._row_block for p in parts])
+        row_offsets = np.cumsum([0] + [len(p._row_block) for p in parts])
+        joined._group_start = np.concatenate(
+            [p._group_start[:-1] + offset for p, offset in zip(parts, row_offsets)] + [row_offsets[-1:]]
+        ).astype(np.int64)
+        slots, used = [], np.zeros(len(parts[0]._bits), dtype=np.int64)
+        for p in parts:
+            slots.append(p._row_slot + used[p._row_block])
+            used += [len(bits) for bits in p._bits]
+        joined._row_slot = np.concatenate(slots)
+        joined._bits = [np.concatenate([p._bits[b] for p in parts]) for b in range(len(parts[0]._bits))]
+        joined.n_groups = sum(p.n_groups for p in parts)
+        joined.total = joined.count(np.arange(joined.n_groups))
+        return joined
+
+
+class HyperLogLogSketch:
+    """
+    Approximate distinct counts of members over any union of groups.
+
+    Each group keeps 2**precision one-byte HyperLogLog registers; a selection
+    is merged by taking the register-wise maximum. Size does not grow with
+    the number of distinct members, at the cost of a few percent error.
+    """
+
+    def __init__(self, groups, members, n_groups, precision=HLL_PRECISION):
+        groups = np.asarray(groups, dtype=np.int64)
+        members = np.asarray(members, dtype=np.int64)
+        keep = members >= 0
+        groups, members = groups[keep], members[keep]
+        self.precision = precision
+        size = 1 << precision
+        hashed = pd.util.hash_array(members)
+        register = (hashed >> np.uint64(64 - precision)).astype(np.int64)
+        # Leading zeros + 1 over the next 52 bits, which float64 holds exactly.
+        rest = (hashed >> np.uint64(64 - precision - _HASH_BITS)) & np.uint64((1 << _HASH_BITS) - 1)
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = (_HASH_BITS + 1 - exponent).astype(np.uint8)
+        self._registers = np.zeros((n_groups, size), dtype=np.uint8)
+        np.maximum.at(self._registers, (groups, register), rank)
+        self.n_groups = n_groups
+        self.total = self.count(np.arange(n_groups))
+
+    @property
+    def nbytes(self):
+        return self._registers.nbytes
+
+    def count(self, selected):
+        """
+        Returns the estimated number of distinct members across the selected group ids.
+        """
+        selected = np.asarray(selected, dtype=np.int64)
+        if not len(selected):
+            return 0
+        merged = self._registers[selected].max(axis=0)
+        size = len(merged)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / np.ldexp(1.0, -merged.astype(np.int64)).sum()
+        empty = int((merged == 0).sum())
+        if estimate <= 2.5 * size and empty:
+            estimate = size * np.log(size / empty)
+        return int(round(estimate))
+
+    def take(self, selected):
+        """
+        Returns a sketch of just the selected group ids, in the order given.
+        """
+        taken = HyperLogLogSketch.__new__(HyperLogLogSketch)
+        taken.precision = self.precision
+        taken._registers = self._registers[np.asarray(selected, dtype=np.int64)]
+        taken.n_groups = len(taken._registers)
+        taken.total = taken.count(np.arange(taken.n_groups))
+        return taken
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Returns one sketch holding the groups of each part in turn.
+        """
+        joined = cls.__new__(cls)
+        joined.precision = parts[0].precision
+        joined._registers = np.concatenate([p._registers for p in parts])
+        joined.n_groups = len(joined._registers)
+        joined.total = joined.count(np.arange(joined.n_groups))
+        return joined
+
+
+MODES = ('bitset', 'hll')
+
+
+def build(mode, groups, members, n_groups, blocks=None, n_members=None):
+    """
+    Returns a sketch of the given mode ('bitset' or 'hll') over (group, member) pairs.
+    """
+    if mode == 'bitset':
+        return BitsetSketch(groups, members, n_groups, blocks, n_members)
+    if mode == 'hll':
+        return HyperLogLogSketch(groups, members, n_groups)
+    raise ValueError(f"Unknown sketch mode {mode!r}; expected one of {MODES}")
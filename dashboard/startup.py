@@ -0,0 +1,104 @@
+import importlib
+import time
+
+import dataset
+import precompute
+import result_cache
+import views
+
+# Objects warm() built before the server started, handed once to the app's
+# st.cache_resource loaders.
+_prepared = {}
+
+
+def take(name, build):
+    """
+    Returns the object warm() prepared under name, or build() if there is none.
+    Each prepared object is handed out once, so a cleared resource cache builds afresh.
+    """
+    prepared = _prepared.pop(name, None)
+    return build() if prepared is None else prepared
+
+
+def seeded_cache(shared):
+    """
+    Returns a ResultCache holding the views precompute.py saved for shared.
+    """
+    results = result_cache.ResultCache()
+    if shared is not None:
+        precompute.warm(results, shared)
+    return results
+
+
+def warm():
+    """
+    Does the work of a first visit ahead of time: imports the chart modules,
+    loads the shared dataset (ingesting the CSV if needed), builds the filter
+    index and fills the result cache with every section of the default
+    selection. Returns {stage: seconds}.
+    """
+    timings = {}
+
+    def stage(name, func):
+        start = time.perf_counter()
+        value = func()
+        timings[name] = time.perf_counter() - start
+        return value
+
+    def imports():
+        # The app imports these where the page first needs them.
+        for name in ('charts', 'tables'):
+            importlib.import_module(name)
+
+    stage('imports', imports)
+    shared = stage('dataset', dataset.load_shared)
+    results = stage('result_cache', lambda: seeded_cache(shared))
+    if shared is not None and not shared.empty:
+        if shared.backend == 'pandas':
+            stage('index', lambda: shared.index)
+        selection = views.default_selection(shared)
+        by_manufacturer = bool(shared.manufacturers)
+
+        def default_views():
+            for section in views.SECTIONS:
+                results.get_or_compute(
+                    views.cache_key(shared, selection, section),
+                    lambda: views.compute_section(shared.select(**selection), by_manufacturer, section),
+                )
+
+        stage('default_views', default_views)
+    _prepared.update(shared=shared, results=results)
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    from streamlit.web import cli
+
+    parser = argparse.ArgumentParser(
+        description="Warms the dataset and default views, then starts the dashboard. "
+                    "Other options (e.g. --server.port 8501) are passed to streamlit run."
+    )
+    parser.add_argument('--csv', help="full VAHAN export (default: auto-detect)")
+    parser.add_argument('--backend', choices=dataset.BACKENDS, help="query backend (default: $VAHAN_BACKEND)")
+    args, streamlit_args = parser.parse_known_args()
+    if args.csv:
+        os.environ['VAHAN_CSV'] = os.path.abspath(args.csv)
+    if args.backend:
+        os.environ['VAHAN_BACKEND'] = args.backend
+
+    # The app imports this module as `startup`, not `__main__`; warm that copy.
+    import startup
+
+    start = time.perf_counter()
+    for name, seconds in startup.warm().items():
+        print(f"  {name:<14} {seconds:6.2f} s")
+    print(f"Warmed in {time.perf_counter() - start:.2f} s; starting the server.")
+
+    # Runs the server in this process, so the port only opens once warm.
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    sys.argv = ['streamlit', 'run', app] + streamlit_args
+    sys.exit(cli.main())
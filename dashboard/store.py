@@ -0,0 +1,438 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import growth
+
+# Bump when the derived columns change so old cache files get rebuilt.
+CACHE_VERSION = 3
+CACHE_DIR_NAME = ".vahan_cache"
+
+MANUFACTURER_FILE = "VAHAN_Vehicle_Registrations_with_Manufacturer.csv"
+SAMPLE_FILE = "VAHAN Vehicle Registrations by Vehicle Category_Sample_Data.csv"
+
+# Low-cardinality text columns stored as dictionary-encoded categoricals.
+CATEGORICAL_COLUMNS = [
+    'State Name (state_name)',
+    'RTO Name (office_name)',
+    'RTO Code (office_code)',
+    'Vehicle Category',
+    'Manufacturer',
+    'Categorized By (category)',
+    'Quarter',
+]
+# Raw columns fully replaced by a derived column after preprocessing.
+RAW_DUPLICATES = [
+    'Date (date)',
+    'Vehicle Category (vehicle_type)',
+    'Registrations (registrations)',
+]
+
+
+def find_source_csv(base_dir=None):
+    """
+    Returns the path of the VAHAN CSV the dashboard should use, or None.
+    The manufacturer file is preferred over the old sample file.
+    """
+    base_dir = base_dir or os.getcwd()
+    for name in (MANUFACTURER_FILE, SAMPLE_FILE):
+        for candidate in (
+            os.path.join(base_dir, "..", name),
+            os.path.join(base_dir, "data", name),
+            os.path.join(base_dir, name),
+        ):
+            if os.path.exists(candidate):
+                return os.path.normpath(candidate)
+    return None
+
+
+def preprocess(df):
+    """
+    Adds the derived Date, Year, Quarter, Vehicle Category and Registrations columns.
+    """
+    df['Date'] = pd.to_datetime(df['Date (date)'])
+    df['Year'] = df['Date'].dt.year
+    df['Quarter'] = df['Date'].dt.to_period('Q').astype(str)
+    df['Vehicle Category'] = df['Vehicle Category (vehicle_type)']
+    df['Registrations'] = pd.to_numeric(df['Registrations (registrations)'], errors='coerce')
+    if 'Manufacturer' in df.columns:
+        df['Manufacturer'] = df['Manufacturer'].astype(str)
+    return df
+
+
+def narrow_counts(values):
+    """
+    Casts integral counts to int32, or nullable Int32/Int64 when needed.
+    Non-integral values are returned unchanged.
+    """
+    non_null = values.dropna()
+    if len(non_null) and not (non_null == non_null.round()).all():
+        return values
+    if non_null.abs().max() > np.iinfo(np.int32).max:
+        return values.astype('Int64')
+    return values.astype('Int32' if values.isna().any() else 'int32')
+
+
+def compact(df):
+    """
+    Shrinks a preprocessed frame: categoricals for text dimensions, narrow
+    integers for Year, State Code and Registrations, raw duplicates dropped.
+    """
+    df = df.drop(columns=[c for c in RAW_DUPLICATES if c in df.columns])
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if df['Year'].notna().all():
+        df['Year'] = df['Year'].astype('int16')
+    code = 'State Code (state_code)'
+    if code in df.columns:
+        try:
+            df[code] = pd.to_numeric(df[code], downcast='integer')
+        except (TypeError, ValueError):
+            df[code] = df[code].astype('category')
+    df['Registrations'] = narrow_counts(df['Registrations'])
+    return df
+
+
+def footprint(df):
+    """
+    Returns the deep in-memory size of df in bytes.
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def concat_frames(frames):
+    """
+    Concatenates compact frames, keeping categorical columns categorical.
+    Categories are unioned and kept sorted so groupby order stays alphabetical.
+    """
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    frames = [f.copy(deep=False) for f in frames]
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = sorted(set().union(*(f[col].cat.categories for f in frames)))
+            for f in frames:
+                f[col] = f[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _frame_hash(df):
+    # Hashes values, not categorical codes, so the same rows always match.
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def cache_dir(csv_path):
+    """
+    Returns the folder holding the month partitions built from csv_path.
+    """
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME, stem)
+
+
+def _manifest_path(csv_path):
+    return os.path.join(cache_dir(csv_path), "manifest.json")
+
+
+def cache_info(csv_path):
+    """
+    Returns the manifest recorded for csv_path's partitions, or None if not built.
+    """
+    try:
+        with open(_manifest_path(csv_path)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == CACHE_VERSION else None
+
+
+def _write_manifest(csv_path, meta):
+    path = _manifest_path(csv_path)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, path)
+
+
+def dataset_version(meta):
+    """
+    Content version of the partitioned store: equal data gives an equal version.
+    """
+    h = hashlib.sha256()
+    for key in sorted(meta["partitions"]):
+        h.update(f"{key}:{meta['partitions'][key]['hash']};".encode())
+    return h.hexdigest()
+
+
+def years_version(partitions, years):
+    """
+    Content version of the {key: hash} partitions of the given years only.
+    """
+    wanted = {f"{int(y):04d}" for y in years}
+    h = hashlib.sha256()
+    for key in sorted(partitions):
+        if key[:4] in wanted:
+            h.update(f"{key}:{partitions[key]};".encode())
+    return h.hexdigest()
+
+
+def is_fresh(csv_path):
+    """
+    Checks whether the partitions still match csv_path.
+    A changed mtime/size alone does not force a rebuild: the content hash is
+    compared first, so touching the file keeps the cache.
+    """
+    meta = cache_info(csv_path)
+    if meta is None:
+        return False
+    st = os.stat(csv_path)
+    if meta.get("mtime_ns") == st.st_mtime_ns and meta.get("size") == st.st_size:
+        return True
+    if meta.get("size") != st.st_size or meta.get("sha256") != _file_hash(csv_path):
+        return False
+    meta["mtime_ns"] = st.st_mtime_ns
+    _write_manifest(csv_path, meta)
+    return True
+
+
+def partition_key(month_code):
+    """
+    Names the partition for an integer month code; undated rows share one.
+    """
+    if pd.isna(month_code):
+        return "undated"
+    return f"{int(month_code) // 12:04d}-{int(month_code) % 12 + 1:02d}"
+
+
+def partition_code(key):
+    """
+    Inverse of partition_key: the month code of a partition, None if undated.
+    """
+    if key == "undated":
+        return None
+    year, month = key.split("-")
+    return int(year) * 12 + int(month) - 1
+
+
+def split_months(df):
+    """
+    Splits a compact frame into {partition_key: rows} by calendar month.
+    """
+    codes = growth.month_codes(df['Date'])
+    parts = {}
+    for code, rows in df.groupby(codes, dropna=False, sort=True):
+        rows = rows.reset_index(drop=True)
+        for col in rows.columns:
+            if isinstance(rows[col].dtype, pd.CategoricalDtype):
+                rows[col] = rows[col].cat.remove_unused_categories()
+        parts[partition_key(code)] = rows
+    return parts
+
+
+def write_arrow(path, df):
+    """
+    Writes df to path as an uncompressed Arrow IPC file, atomically.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Uncompressed so the file can be memory-mapped without decoding.
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _store_months(csv_path, parts, meta, replace_all):
+    """
+    Writes only partitions whose content hash changed and updates the manifest.
+    Returns the sorted keys of partitions that were added, changed or removed.
+    """
+    folder = cache_dir(csv_path)
+    os.makedirs(folder, exist_ok=True)
+    known = meta.setdefault("partitions", {})
+    changed = []
+    for key, rows in parts.items():
+        digest = _frame_hash(rows)
+        if known.get(key, {}).get("hash") == digest:
+            continue
+        write_arrow(os.path.join(folder, key + ".arrow"), rows)
+        known[key] = {"file": key + ".arrow", "rows": len(rows), "hash": digest}
+        changed.append(key)
+    if replace_all:
+        for key in set(known) - set(parts):
+            try:
+                os.remove(os.path.join(folder, known.pop(key)["file"]))
+            except OSError:
+                pass
+            changed.append(key)
+    meta["rows"] = sum(p["rows"] for p in known.values())
+    meta["generation"] = meta.get("generation", 0) + (1 if changed else 0)
+    _write_manifest(csv_path, meta)
+    return sorted(changed)
+
+
+def _read_update(path):
+    df = preprocess(pd.read_csv(path))
+    memory_before = footprint(df)
+    df = compact(df)
+    return df, memory_before, footprint(df)
+
+
+def _remove_single_file_cache(csv_path):
+    # Before month partitions the whole export was cached as <stem>.arrow
+    # with <stem>.meta.json; the partitions replace it, so drop the old files.
+    base = cache_dir(csv_path)
+    for path in (base + ".arrow", base + ".meta.json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def ingest(csv_path, force=False):
+    """
+    Syncs the month partitions with the full export at csv_path.
+    Only months whose rows changed are rewritten; months missing from the
+    export are dropped. Returns the changed partition keys ([] if fresh).
+    """
+    _remove_single_file_cache(csv_path)
+    if not force and is_fresh(csv_path):
+        return []
+    st = os.stat(csv_path)
+    df, memory_before, memory_after = _read_update(csv_path)
+    meta = (cache_info(csv_path) or {}) if not force else {}
+    meta.update({
+        "version": CACHE_VERSION,
+        "source": os.path.abspath(csv_path),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": _file_hash(csv_path),
+        "memory_before": memory_before,
+        "memory_after": memory_after,
+    })
+    return _store_months(csv_path, split_months(df), meta, replace_all=True)
+
+
+def append(csv_path, update_path):
+    """
+    Adds or replaces the months contained in update_path, a CSV holding only
+    the new data (usually one month), without reading the full export.
+    Returns the changed partition keys.
+    """
+    meta = cache_info(csv_path)
+    if meta is None:
+        ingest(csv_path)
+        meta = cache_info(csv_path)
+    df, _, _ = _read_update(update_path)
+    return _store_months(csv_path, split_months(df), meta, replace_all=False)
+
+
+def _read_table(path):
+    with pa.memory_map(path, "r") as source:
+        return ipc.open_file(source).read_all()
+
+
+def _to_pandas(table):
+    # Columns without nulls stay backed by the mapped pages where pandas
+    # allows, so replicas on one host share them through the OS page cache.
+    df = table.to_pandas(split_blocks=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            categories = df[col].cat.categories
+            if not categories.is_monotonic_increasing:
+                df[col] = df[col].cat.set_categories(sorted(categories))
+    return df
+
+
+def _widen_dictionaries(table):
+    # Small partitions get int8 dictionary indices, too narrow once unified.
+    fields = [
+        pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type), f.nullable)
+        if pa.types.is_dictionary(f.type) else f
+        for f in table.schema
+    ]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def read_partition(path):
+    """
+    Memory-maps one Arrow IPC file and returns it as a DataFrame.
+    """
+    return _to_pandas(_read_table(path))
+
+
+def read_months(csv_path, keys=None):
+    """
+    Returns the rows of the given partitions (all partitions if keys is None).
+    Partitions are concatenated as Arrow tables with unified dictionaries, so
+    categoricals are merged once per column rather than once per month.
+    """
+    meta = cache_info(csv_path)
+    if meta is None:
+        return pd.DataFrame()
+    folder = cache_dir(csv_path)
+    keys = sorted(meta["partitions"]) if keys is None else [k for k in keys if k in meta["partitions"]]
+    if not keys:
+        return pd.DataFrame()
+    tables = [
+        _widen_dictionaries(_read_table(os.path.join(folder, meta["partitions"][k]["file"])))
+        for k in keys
+    ]
+    table = pa.concat_tables(tables, promote_options="permissive").unify_dictionaries()
+    return _to_pandas(table)
+
+
+def format_footprint(meta):
+    """
+    Formats the before/after memory footprint recorded at ingest time.
+    """
+    before, after = meta["memory_before"] / 2**20, meta["memory_after"] / 2**20
+    return f"{before:,.2f} MB raw -> {after:,.2f} MB compact ({after / before:.0%})"
+
+
+def load_dataset(base_dir=None):
+    """
+    Returns the preprocessed VAHAN dataset, building the partitions if needed.
+    Returns an empty DataFrame if no source CSV is found.
+    """
+    csv_path = find_source_csv(base_dir)
+    if csv_path is None:
+        return pd.DataFrame()
+    ingest(csv_path)
+    return read_months(csv_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Builds or updates the month-partitioned VAHAN store.")
+    parser.add_argument("csv", nargs="?", help="full VAHAN export (default: auto-detect)")
+    parser.add_argument("--append", metavar="UPDATE_CSV", help="add or replace only the months in this file")
+    parser.add_argument("--force", action="store_true", help="rewrite every partition")
+    args = parser.parse_args()
+
+    path = args.csv or find_source_csv()
+    if path is None:
+        print("No VAHAN CSV found.")
+    else:
+        if args.append:
+            changed = append(path, args.append)
+        else:
+            changed = ingest(path, force=args.force)
+        print(f"Updated {len(changed)} partition(s) in {cache_dir(path)}: {', '.join(changed) or 'none'}")
+        print(f"Memory footprint: {format_footprint(cache_info(path))}")
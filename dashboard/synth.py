@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# (state name, state code, RTO prefix, share of national registrations)
+STATES = [
+    ('Uttar Pradesh', 9, 'UP', 0.135), ('Maharashtra', 27, 'MH', 0.105),
+    ('Tamil Nadu', 33, 'TN', 0.085), ('Gujarat', 24, 'GJ', 0.065),
+    ('Karnataka', 29, 'KA', 0.065), ('Rajasthan', 8, 'RJ', 0.055),
+    ('Madhya Pradesh', 23, 'MP', 0.05), ('Bihar', 10, 'BR', 0.045),
+    ('West Bengal', 19, 'WB', 0.04), ('Kerala', 32, 'KL', 0.04),
+    ('Andhra Pradesh', 28, 'AP', 0.035), ('Telangana', 36, 'TS', 0.035),
+    ('Haryana', 6, 'HR', 0.03), ('Delhi', 7, 'DL', 0.03),
+    ('Odisha', 21, 'OR', 0.025), ('Punjab', 3, 'PB', 0.025),
+    ('Assam', 18, 'AS', 0.02), ('Chhattisgarh', 22, 'CG', 0.02),
+    ('Jharkhand', 20, 'JH', 0.02), ('Uttarakhand', 5, 'UK', 0.01),
+    ('Himachal Pradesh', 2, 'HP', 0.008), ('Jammu And Kashmir', 1, 'JK', 0.008),
+    ('Goa', 30, 'GA', 0.005), ('Tripura', 16, 'TR', 0.003),
+    ('Meghalaya', 17, 'ML', 0.002), ('Manipur', 14, 'MN', 0.002),
+    ('Chandigarh', 4, 'CH', 0.002), ('Puducherry', 34, 'PY', 0.002),
+    ('Nagaland', 13, 'NL', 0.0015), ('Arunachal Pradesh', 12, 'AR', 0.0015),
+    ('Mizoram', 15, 'MZ', 0.0012), ('Sikkim', 11, 'SK', 0.001),
+    ('The Dadra And Nagar Haveli And Daman And Diu', 38, 'DD', 0.001),
+    ('Andaman And Nicobar Island', 35, 'AN', 0.0008), ('Ladakh', 37, 'LA', 0.0005),
+    ('Lakshadweep', 31, 'LD', 0.0002),
+]
+
+# Vehicle categories seen in the VAHAN export, most common first.
+CATEGORIES = [
+    'Light Motor Vehicle', 'Two Wheeler(Nt)', 'Light Goods Vehicle', 'Heavy Goods Vehicle',
+    'Light Passenger Vehicle', 'Medium Goods Vehicle', 'Three Wheeler(T)',
+    'Other Than Mentioned Above', 'Medium Motor Vehicle', 'Medium Passenger Vehicle',
+    'Heavy Passenger Vehicle', 'Two Wheeler (Invalid Carriage)', 'Four Wheeler (Invalid Carriage)',
+    'Heavy Motor Vehicle', 'Three Wheeler(Nt)', 'Two Wheeler(T)',
+]
+
+KNOWN_MANUFACTURERS = ['Maruti', 'Hero', 'Honda', 'Tata', 'Mahindra', 'Bajaj', 'Hyundai']
+
+COLUMNS = [
+    'Date (date)', 'State Name (state_name)', 'State Code (state_code)', 'RTO Name (office_name)',
+    'RTO Code (office_code)', 'Vehicle Category (vehicle_type)', 'Manufacturer',
+    'Categorized By (category)', 'Registrations (registrations)',
+]
+
+
+def _zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def dimensions(rtos=1500, manufacturers=120):
+    """
+    Returns the RTO table (state, code, RTO name/code, weight) and the
+    manufacturer names used by the generator.
+    """
+    shares = np.array([s[3] for s in STATES])
+    shares = shares / shares.sum()
+    # Every state gets at least one RTO; the rest follow registration share.
+    per_state = np.maximum(1, np.round(shares * rtos).astype(int))
+    rows = []
+    for (name, code, prefix, _), share, count in zip(STATES, shares, per_state):
+        weights = _zipf_weights(count, 0.8) * share
+        for i in range(count):
+            rows.append((name, code, f'{name} Rto {i + 1}', f'{prefix}{i + 1}', weights[i]))
+    rto_table = pd.DataFrame(rows, columns=['state', 'state_code', 'rto', 'rto_code', 'weight'])
+    names = KNOWN_MANUFACTURERS + [f'Manufacturer {i:03d}' for i in range(1, manufacturers - len(KNOWN_MANUFACTURERS) + 1)]
+    return rto_table, names[:manufacturers]
+
+
+def generate(rows, start='2019-01', months=72, rtos=1500, manufacturers=120, seed=0):
+    """
+    Returns a DataFrame of `rows` synthetic registrations in the VAHAN export
+    schema. States, RTOs, categories and manufacturers follow skewed
+    (Zipf-like) popularity and counts are heavy-tailed, like the real data.
+    seed may be an int or a sequence of ints.
+    """
+    rng = np.random.default_rng(seed)
+    rto_table, names = dimensions(rtos, manufacturers)
+    rto_weights = rto_table['weight'].to_numpy() / rto_table['weight'].sum()
+
+    rto_idx = rng.choice(len(rto_table), size=rows, p=rto_weights)
+    category_idx = rng.choice(len(CATEGORIES), size=rows, p=_zipf_weights(len(CATEGORIES), 1.1))
+    manufacturer_idx = rng.choice(len(names), size=rows, p=_zipf_weights(len(names), 1.2))
+    month_idx = rng.integers(0, months, size=rows)
+    dates = pd.period_range(start, periods=months, freq='M').to_timestamp().strftime('%Y-%m-%d')
+    # Lognormal counts: median around 15, a long tail into the tens of thousands.
+    registrations = np.ceil(rng.lognormal(mean=2.7, sigma=2.0, size=rows)).clip(1, 250000)
+
+    return pd.DataFrame({
+        COLUMNS[0]: np.asarray(dates)[month_idx],
+        COLUMNS[1]: rto_table['state'].to_numpy()[rto_idx],
+        COLUMNS[2]: rto_table['state_code'].to_numpy()[rto_idx],
+        COLUMNS[3]: rto_table['rto'].to_numpy()[rto_idx],
+        COLUMNS[4]: rto_table['rto_code'].to_numpy()[rto_idx],
+        COLUMNS[5]: np.asarray(CATEGORIES)[category_idx],
+        COLUMNS[6]: np.asarray(names)[manufacturer_idx],
+        COLUMNS[7]: 'Vehicle Category',
+        COLUMNS[8]: registrations,
+    })
+
+
+def write_csv(path, rows, chunk_rows=1_000_000, seed=0, **kwargs):
+    """
+    Writes `rows` synthetic registrations to path in chunks, so 100M-row
+    files never need to fit in memory. Same seed gives the same file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    written = 0
+    chunk = 0
+    with open(path, 'w', newline='') as f:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            generate(n, seed=[seed, chunk], **kwargs).to_csv(f, index=False, header=(chunk == 0))
+            written += n
+            chunk += 1
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Writes a synthetic VAHAN registrations CSV.")
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=float, default=1e6)
+    parser.add_argument('--months', type=int, default=72)
+    parser.add_argument('--rtos', type=int, default=1500)
+    parser.add_argument('--manufacturers', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_csv(args.path, int(args.rows), seed=args.seed, months=args.months,
+              rtos=args.rtos, manufacturers=args.manufacturers)
+    print(f"Wrote {int(args.rows):,} rows to {args.path}")
@@ -0,0 +1,102 @@
+import math
+
+import numpy as np
+import streamlit as st
+
+import result_cache
+
+PAGE_SIZES = [25, 50, 100, 250]
+ORIGINAL_ORDER = "(original order)"
+
+# Sort orders and colour ranges of the tables on screen, keyed by the
+# version of the frame they were computed from, so paging never re-sorts.
+_orders = result_cache.ResultCache(max_bytes=64 * 2**20)
+
+
+def _memo(version, part, compute):
+    if version is None:
+        return compute()
+    return _orders.get_or_compute((version, part), compute)
+
+
+def sort_positions(frame, column, ascending=True):
+    """
+    Returns the row positions of frame ordered by column, NaNs last.
+    The sort is stable, so ties keep their original order.
+    """
+    values = frame[column].reset_index(drop=True)
+    return values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+
+
+def page_rows(frame, page, page_size, sort_by=None, ascending=True, version=None):
+    """
+    Returns the rows on 1-based page `page`, after an optional sort.
+    Only the page's rows are copied; the frame itself is never reordered.
+    With a version identifying frame's contents, the sort order is cached.
+    """
+    start = (page - 1) * page_size
+    if sort_by is None:
+        return frame.iloc[start:start + page_size]
+    order = _memo(version, ('sort', sort_by, ascending), lambda: sort_positions(frame, sort_by, ascending))
+    return frame.take(order[start:start + page_size])
+
+
+def value_range(frame, column):
+    """
+    Returns (min, max) of a numeric column over every row, ignoring NaN.
+    """
+    values = frame[column].to_numpy(dtype=float)
+    if not np.isfinite(values).any():
+        return None, None
+    return float(np.nanmin(values)), float(np.nanmax(values))
+
+
+def _first_page(page_key):
+    st.session_state[page_key] = 1
+
+
+def show(frame, key, formats, gradient=None, cmap='RdYlGn', height=None, page_size=50, version=None):
+    """
+    Renders one page of frame with sort and paging controls.
+
+    Sorting and slicing happen here, so only the visible page is styled and
+    sent to the browser. The gradient column's colour scale spans the whole
+    frame, not just the page, so colours mean the same thing on every page.
+    version identifies frame's contents (e.g. its result cache key); with
+    it, sort orders and colour ranges are computed once per version.
+    Returns the rows shown.
+    """
+    page_key = f"{key}_page"
+    # A new sort or page size starts again from the first page.
+    restart = dict(on_change=_first_page, args=(page_key,))
+    sort_col, order_col, size_col, page_col = st.columns([3, 2, 1, 1])
+    sort_by = sort_col.selectbox(
+        "Sort by", [ORIGINAL_ORDER] + list(frame.columns), key=f"{key}_sort", **restart
+    )
+    descending = order_col.selectbox(
+        "Order", ["Descending", "Ascending"], key=f"{key}_order",
+        disabled=sort_by == ORIGINAL_ORDER, **restart
+    ) == "Descending"
+    size = size_col.selectbox(
+        "Rows", PAGE_SIZES, index=PAGE_SIZES.index(page_size), key=f"{key}_size", **restart
+    )
+    pages = max(1, math.ceil(len(frame) / size))
+    st.session_state.setdefault(page_key, 1)
+    if st.session_state[page_key] > pages:
+        st.session_state[page_key] = pages
+    page = page_col.number_input("Page", min_value=1, max_value=pages, key=page_key)
+
+    version = None if version is None else (version, key)
+    rows = page_rows(frame, page, size, None if sort_by == ORIGINAL_ORDER else sort_by, not descending, version)
+    styler = rows.style.format(formats)
+    if gradient is not None:
+        low, high = _memo(version, ('range', gradient), lambda: value_range(frame, gradient))
+        styler = styler.background_gradient(subset=[gradient], cmap=cmap, vmin=low, vmax=high)
+    st.dataframe(styler, width="stretch", height=height)
+
+    first = (page - 1) * size
+    if len(frame):
+        st.caption(f"Rows {first + 1:,}–{first + len(rows):,} of {len(frame):,} · page {page} of {pages}")
+    else:
+        st.caption("No rows")
+    return rows
@@ -0,0 +1,120 @@
+import growth
+import result_cache
+
+
+def summary(selection, by_manufacturer):
+    """
+    Registrations per Year x Vehicle Category (x Manufacturer).
+    """
+    if by_manufacturer:
+        return selection.rollup(['Year', 'Vehicle Category', 'Manufacturer'])
+    return selection.rollup(['Year', 'Vehicle Category'])
+
+
+def top_manufacturers(agg, n=10):
+    """
+    Rows of agg for the n manufacturers with the most registrations.
+    """
+    top = agg.groupby('Manufacturer', observed=True)['Registrations'].sum().nlargest(n).index
+    return agg[agg['Manufacturer'].isin(top)]
+
+
+def growth_keys(by_manufacturer):
+    return ['Manufacturer', 'Vehicle Category'] if by_manufacturer else ['Vehicle Category']
+
+
+def default_selection(shared):
+    """
+    The sidebar's initial selection: every year and category and the first
+    ten manufacturers, with no state or RTO filter.
+    """
+    return {
+        'years': shared.years,
+        'categories': shared.categories,
+        'manufacturers': shared.manufacturers[:10] if shared.manufacturers else None,
+        'states': None,
+        'rtos': None,
+    }
+
+
+def cache_key(shared, selection, part):
+    """
+    Result cache key for one part (e.g. a section) of a selection's views.
+    It carries the version of the selected years only, since every view is
+    computed from the selected rows, so refreshing other months keeps it.
+    """
+    return result_cache.make_key(shared.version_for(selection['years']), selection, part)
+
+
+def _call(name, func, rows_in=None):
+    return func()
+
+
+# Views grouped by the dashboard section that shows them. Each section is
+# computed and cached on its own, so a closed tab computes nothing.
+SECTIONS = {
+    'overview': ['kpis', 'agg', 'agg_top'],
+    'yoy': ['yoy'],
+    'qoq': ['qoq'],
+    'mom': ['mom'],
+    'insights': ['state_summary', 'category_dist'],
+    'states': ['state_level'],
+}
+
+
+def compute_section(selection, by_manufacturer, section, run=None):
+    """
+    Computes the views of one SECTIONS entry for a selection.
+    Each view is timed as a stage of run (a profiler.Run) when given.
+    """
+    call = run.call if run is not None else _call
+    cells = len(selection.cells)
+    keys = growth_keys(by_manufacturer)
+    if section == 'overview':
+        agg = call('summary', lambda: summary(selection, by_manufacturer), cells)
+        return {
+            'kpis': call('kpis', selection.kpis, cells),
+            'agg': agg,
+            'agg_top': call('top_manufacturers', lambda: top_manufacturers(agg), len(agg)) if by_manufacturer else None,
+        }
+    if section == 'yoy':
+        return {'yoy': call('growth_yoy', lambda: growth.period_growth(selection.cells, 'year', keys), cells)}
+    if section == 'qoq':
+        return {'qoq': call('growth_qoq', lambda: growth.period_growth(selection.cells, 'quarter', keys), cells)}
+    if section == 'mom':
+        return {'mom': call('growth_mom', lambda: growth.period_growth(selection.cells, 'month', ['Vehicle Category']), cells)}
+    if section == 'insights':
+        return {
+            'state_summary': call('state_summary', lambda: selection.rollup('State Name (state_name)').nlargest(10), cells),
+            'category_dist': call('category_dist', lambda: selection.rollup('Vehicle Category'), cells),
+        }
+    if section == 'states':
+        return {'state_level': call('state_level', selection.state_level, cells)}
+    raise ValueError(f"unknown section {section!r}")
+
+
+def rto_part(state_code):
+    """
+    The result cache part for the RTO level of one state; see rto_level.
+    """
+    return f'rtos:{state_code}'
+
+
+def rto_level(selection, state_code, run=None):
+    """
+    The drill-down's RTO level for one state. Computed only for the state
+    a user expands, so it is not part of any section.
+    """
+    call = run.call if run is not None else _call
+    return call('rto_level', lambda: selection.rto_level(state_code))
+
+
+def compute_views(selection, by_manufacturer, run=None):
+    """
+    Computes every table and chart input the dashboard shows for one selection.
+    Returned frames are shared through the result cache and must not be mutated.
+    """
+    computed = {}
+    for section in SECTIONS:
+        computed.update(compute_section(selection, by_manufacturer, section, run))
+    return computed